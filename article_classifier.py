@@ -0,0 +1,285 @@
+import argparse
+import csv
+import heapq
+import os
+import re
+from collections import Counter, deque
+from multiprocessing import Pool
+
+import numpy as np
+
+# Python port of #gpanalzyer(testspace).r: classify .txt articles on aging in
+# Hong Kong by keyword category and list each article's most common words.
+# The R script builds a dense document-term matrix, which runs out of memory past
+# a few thousand articles, and its multi-word keywords ("residential care") never
+# match the single-word columns. Here files are read and tokenized in a process
+# pool, one article at a time, and every keyword (one or more words, cleaned the
+# same way as the text) is counted by an Aho-Corasick automaton over the token
+# stream. Keyword hits form a sparse (CSR) article x keyword matrix that is summed
+# into category scores per chunk of articles, and results are written as they
+# arrive, so memory stays flat however many articles there are:
+#
+#   python article_classifier.py ConvertedFiles "analysis result" --workers 4
+
+CATEGORIES = {
+    "Healthcare": [
+        "care", "health", "geriatric services", "health institutions",
+        "community nursing", "subvented care", "residential care",
+        "health management", "elderly health", "medical support", "institutions",
+    ],
+    "Policy": [
+        "population", "ageing", "government", "economic policy",
+        "labour policies", "social security", "savings schemes",
+        "retirement protection", "elderly poverty alleviation",
+        "projected demographics", "aging", "initiatives",
+    ],
+    "Housing": [
+        "housing", "residential", "mobility", "elderly housing",
+        "senior residential", "housing mobility", "age-friendly architecture",
+        "Hong Kong Housing Authority", "subsidized flats", "elderly hostels",
+        "multi-generational housing", "residents' needs", "barrier-free design",
+    ],
+    "Technology": [
+        "telemedicine", "AI-powered eldercare", "wearable health tracker",
+        "Jockey Club Gerontechnology", "smart elderly homes",
+        "fall detection systems", "robotic care assistants",
+    ],
+}
+UNCLASSIFIED = "Unclassified"
+
+# tm's stopwords("en") plus the script's own extra words. As in R, punctuation is
+# removed first, so the contractions here never match ("don't" is left as "dont").
+STOPWORDS = {
+    "i", "me", "my", "myself", "we", "our", "ours", "ourselves", "you", "your",
+    "yours", "yourself", "yourselves", "he", "him", "his", "himself", "she", "her",
+    "hers", "herself", "it", "its", "itself", "they", "them", "their", "theirs",
+    "themselves", "what", "which", "who", "whom", "this", "that", "these", "those",
+    "am", "is", "are", "was", "were", "be", "been", "being", "have", "has", "had",
+    "having", "do", "does", "did", "doing", "would", "should", "could", "ought",
+    "i'm", "you're", "he's", "she's", "it's", "we're", "they're", "i've", "you've",
+    "we've", "they've", "i'd", "you'd", "he'd", "she'd", "we'd", "they'd", "i'll",
+    "you'll", "he'll", "she'll", "we'll", "they'll", "isn't", "aren't", "wasn't",
+    "weren't", "hasn't", "haven't", "hadn't", "doesn't", "don't", "didn't", "won't",
+    "wouldn't", "shan't", "shouldn't", "can't", "cannot", "couldn't", "mustn't",
+    "let's", "that's", "who's", "what's", "here's", "there's", "when's", "where's",
+    "why's", "how's", "a", "an", "the", "and", "but", "if", "or", "because", "as",
+    "until", "while", "of", "at", "by", "for", "with", "about", "against", "between",
+    "into", "through", "during", "before", "after", "above", "below", "to", "from",
+    "up", "down", "in", "out", "on", "off", "over", "under", "again", "further",
+    "then", "once", "here", "there", "when", "where", "why", "how", "all", "any",
+    "both", "each", "few", "more", "most", "other", "some", "such", "no", "nor",
+    "not", "only", "own", "same", "so", "than", "too", "very",
+    "said",
+}
+# Multi-word phrases removed like stopwords
+STOP_PHRASES = ["hong kong"]
+
+TOP_WORDS = 10
+CLASSIFIED_FILE = "hk_aging_classified_articles.csv"
+COMMON_WORDS_FILE = "common_words_per_file.txt"
+DISTRIBUTION_FILE = "category_distribution.csv"
+DEFAULT_CHUNK_SIZE = 256
+# Files handed to a worker at a time
+POOL_CHUNK_SIZE = 8
+# Width R prints tables at before wrapping
+PRINT_WIDTH = 80
+
+PUNCTUATION = re.compile(r"[^\w\s]|_")
+NUMBERS = re.compile(r"\d+")
+STOP_PHRASE_PATTERN = re.compile(r"\b(?:" + "|".join(r"\s+".join(phrase.split()) for phrase in STOP_PHRASES) + r")\b")
+
+# Function to clean text the way the R script's tm_map steps do
+# Returns the list of tokens left after lower-casing and removing punctuation,
+# numbers, stopwords and stop phrases.
+def tokenize(text):
+    text = NUMBERS.sub("", PUNCTUATION.sub("", text.lower()))
+    text = STOP_PHRASE_PATTERN.sub(" ", text)
+    return [token for token in text.split() if token not in STOPWORDS]
+
+class PhraseMatcher:
+    # Aho-Corasick automaton over tokens; phrases is a list of token tuples
+    def __init__(self, phrases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for phrase_id, phrase in enumerate(phrases):
+            state = 0
+            for token in phrase:
+                if token not in self.goto[state]:
+                    self.goto[state][token] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = self.goto[state][token]
+            self.output[state].append(phrase_id)
+        # Failure links breadth first, so every shorter suffix is done before it is needed
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(token, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    # Counts every occurrence of every phrase in a token list
+    def count(self, tokens):
+        counts = Counter()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for phrase_id in output[state]:
+                counts[phrase_id] += 1
+        return counts
+
+# Function to clean every keyword like the text and flatten the categories
+# Returns (phrases as token tuples, category index of each phrase). Keywords left
+# empty by cleaning can never match and are dropped.
+def keyword_phrases(categories):
+    phrases = []
+    phrase_categories = []
+    for category_index, keywords in enumerate(categories.values()):
+        for keyword in keywords:
+            tokens = tuple(tokenize(keyword))
+            if tokens:
+                phrases.append(tokens)
+                phrase_categories.append(category_index)
+    return phrases, np.array(phrase_categories, dtype=np.int64)
+
+# Each worker process builds its own matcher once
+_matcher = None
+
+def init_worker(phrases):
+    global _matcher
+    _matcher = PhraseMatcher(phrases)
+
+# Function to join the lines of an article's bytes with spaces (readLines + paste)
+def article_text(data):
+    text = data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+    return " ".join(text.removesuffix("\n").split("\n"))
+
+# Function to take the document id from an article's file name
+def doc_id_from_path(path):
+    return os.path.basename(path)[:-len(".txt")]
+
+# Function to count words and keywords in cleaned tokens (in a worker process)
+# Returns (word counts, top words, keyword hits as (phrase ids, counts)).
+def analyze_tokens(tokens):
+    word_counts = Counter(tokens)
+    # Most common words, ties in alphabetical order
+    top_words = heapq.nsmallest(TOP_WORDS, word_counts.items(), key=lambda item: (-item[1], item[0]))
+    hits = _matcher.count(tokens)
+    return word_counts, top_words, (list(hits.keys()), list(hits.values()))
+
+# Function to read, clean and match one article (runs in a worker process)
+# Returns (doc_id, cleaned text, top words, keyword hits).
+def process_file(path):
+    with open(path, "rb") as f:
+        tokens = tokenize(article_text(f.read()))
+    _, top_words, hits = analyze_tokens(tokens)
+    return doc_id_from_path(path), " ".join(tokens), top_words, hits
+
+# Function to sum sparse keyword hits into an article x category score matrix
+# hits holds one (phrase ids, counts) row per article, CSR style.
+def category_scores(hits, phrase_categories, category_count):
+    indptr = np.zeros(len(hits) + 1, dtype=np.int64)
+    np.cumsum([len(phrase_ids) for phrase_ids, _ in hits], out=indptr[1:])
+    indices = np.fromiter((i for phrase_ids, _ in hits for i in phrase_ids), dtype=np.int64, count=indptr[-1])
+    data = np.fromiter((c for _, counts in hits for c in counts), dtype=np.int64, count=indptr[-1])
+    rows = np.repeat(np.arange(len(hits)), np.diff(indptr))
+    scores = np.zeros((len(hits), category_count), dtype=np.int64)
+    np.add.at(scores, (rows, phrase_categories[indices]), data)
+    return scores
+
+# Function to pick each article's dominant category from its scores
+# First one on ties (as max.col with ties.method = "first"), or UNCLASSIFIED
+# when nothing matched.
+def dominant_categories(scores, category_names):
+    labels = np.array(category_names, dtype=object)[scores.argmax(axis=1)]
+    labels[scores.sum(axis=1) == 0] = UNCLASSIFIED
+    return labels.tolist()
+
+# Function to format top words like R prints a table (names over counts)
+def format_word_table(top_words):
+    lines = ["words"]
+    columns = [(word, str(count)) for word, count in top_words]
+    row_names, row_counts = [], []
+    width = 0
+    for word, count in columns:
+        cell = max(len(word), len(count))
+        if row_names and width + cell + 1 > PRINT_WIDTH:
+            lines += [" ".join(row_names) + " ", " ".join(row_counts) + " "]
+            row_names, row_counts, width = [], [], 0
+        row_names.append(word.rjust(cell))
+        row_counts.append(count.rjust(cell))
+        width += cell + 1
+    if row_names:
+        lines += [" ".join(row_names) + " ", " ".join(row_counts) + " "]
+    return "\n".join(lines) + "\n"
+
+# Function to classify every .txt file of a folder into output_dir
+# Returns the number of articles in each category.
+def classify_folder(input_dir, output_dir, categories=CATEGORIES, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    paths = [os.path.join(input_dir, name) for name in sorted(os.listdir(input_dir)) if name.endswith(".txt")]
+    phrases, phrase_categories = keyword_phrases(categories)
+    category_names = list(categories)
+    distribution = Counter()
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, CLASSIFIED_FILE), "w", newline="", encoding="utf-8") as classified_file, \
+            open(os.path.join(output_dir, COMMON_WORDS_FILE), "w", encoding="utf-8") as words_file, \
+            Pool(workers, initializer=init_worker, initargs=(phrases,)) as pool:
+        writer = csv.writer(classified_file, quoting=csv.QUOTE_ALL)
+        writer.writerow(["doc_id", "text", "category"])
+        chunk = []
+        for result in pool.imap(process_file, paths, chunksize=POOL_CHUNK_SIZE):
+            chunk.append(result)
+            if len(chunk) >= chunk_size:
+                _write_chunk(chunk, writer, words_file, phrase_categories, category_names, distribution)
+                chunk = []
+        if chunk:
+            _write_chunk(chunk, writer, words_file, phrase_categories, category_names, distribution)
+    write_distribution(distribution, os.path.join(output_dir, DISTRIBUTION_FILE))
+    return distribution
+
+# Function to classify and write one chunk of processed articles
+def _write_chunk(chunk, writer, words_file, phrase_categories, category_names, distribution):
+    scores = category_scores([hits for _, _, _, hits in chunk], phrase_categories, len(category_names))
+    labels = dominant_categories(scores, category_names)
+    for (doc_id, text, top_words, _), label in zip(chunk, labels):
+        writer.writerow([doc_id, text, label])
+        distribution[label] += 1
+        if text:
+            words_file.write(f"Document ID: {doc_id} \n")
+            words_file.write(format_word_table(top_words))
+            words_file.write("\n")
+
+# Function to save the category counts and percentages (the R bar chart's data)
+def write_distribution(distribution, path):
+    total = sum(distribution.values())
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["category", "count", "percentage"])
+        for category, count in distribution.most_common():
+            writer.writerow([category, count, round(count / total * 100, 1)])
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify .txt articles by aging keyword category.")
+    parser.add_argument("input_dir", help="folder with the .txt articles")
+    parser.add_argument("output_dir", help="folder for the classified CSV and common words")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="articles scored together")
+    args = parser.parse_args()
+    distribution = classify_folder(args.input_dir, args.output_dir, workers=args.workers, chunk_size=args.chunk_size)
+    total = sum(distribution.values())
+    for category, count in distribution.most_common():
+        print(f"{category}: {count} ({count / total * 100:.1f}%)")
+    print(f"Classified {total} articles into {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import csv
+import glob
+import os
+import time
+from multiprocessing import Pool
+
+import pandas as pd
+
+from intake_engine import RESULT_COLUMNS, USER_COLUMNS, compute_intake_targets, format_intake_results
+from row_validation import validate_user_data
+
+# Headless batch run over many small per-user CSVs (Anna.csv, David.csv, ...).
+# Files are grouped into batches of chunk_size; each worker process reads its
+# batch with the csv module, stacks the rows into one frame and runs the
+# vectorized intake engine on it, then hands back finished CSV text. The parent
+# only writes that text, in input order, to one consolidated result file.
+# Age, weight and height are always written as floats so the output doesn't
+# depend on how files happened to be grouped into batches.
+
+DEFAULT_CHUNK_SIZE = 500
+OUTPUT_COLUMNS = ["File"] + RESULT_COLUMNS
+
+# Function to expand directories and glob patterns into a sorted list of CSV files
+def find_user_files(inputs):
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            with os.scandir(item) as entries:
+                files.update(entry.path for entry in entries if entry.is_file() and entry.name.lower().endswith(".csv"))
+        else:
+            files.update(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+    return sorted(files)
+
+# Function to read a batch of user files into one raw roster frame
+# Files missing a required column or that can't be read are returned separately.
+def read_user_files(paths):
+    columns = {column: [] for column in USER_COLUMNS}
+    sources = []
+    rejected = []
+    for path in paths:
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.reader(f)
+                # Headers are matched like row_validation does: stripped and lower-cased
+                header = [column.strip().lower() for column in next(reader, [])]
+                positions = [header.index(column) if column in header else -1 for column in USER_COLUMNS]
+                if -1 in positions:
+                    rejected.append(path)
+                    continue
+                for row in reader:
+                    if not row:
+                        continue
+                    for column, position in zip(USER_COLUMNS, positions):
+                        value = row[position] if position < len(row) else ""
+                        columns[column].append(value if value != "" else None)
+                    sources.append(path)
+        except (OSError, UnicodeDecodeError, csv.Error):
+            rejected.append(path)
+    user_data = pd.DataFrame(columns, dtype=object)
+    user_data["file"] = sources
+    return user_data, rejected
+
+# Function run in each worker: parse, clean and compute one batch of files
+def process_batch(paths):
+    user_data, rejected = read_user_files(paths)
+    user_data, rejections = validate_user_data(user_data)
+    for column in ["age", "weight", "height"]:
+        user_data[column] = user_data[column].astype("float64")
+    targets = compute_intake_targets(user_data)
+    results_df = format_intake_results(user_data, targets)
+    results_df.insert(0, "File", user_data.loc[targets["valid"], "file"].map(os.path.basename).to_numpy())
+    rows_rejected = rejections["row"].nunique() + int((~targets["valid"]).sum())
+    return results_df.to_csv(index=False, header=False), len(results_df), rows_rejected, rejected
+
+# Function to run the whole batch and write the consolidated result file
+def run_batch(paths, output_file, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    batches = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    summary = {"files": len(paths), "rows": 0, "rows_rejected": 0, "files_rejected": []}
+    with open(output_file, "w", newline="") as out:
+        out.write(",".join(OUTPUT_COLUMNS) + "\n")
+        with Pool(processes=workers) as pool:
+            for text, rows, rows_rejected, files_rejected in pool.imap(process_batch, batches):
+                out.write(text)
+                summary["rows"] += rows
+                summary["rows_rejected"] += rows_rejected
+                summary["files_rejected"].extend(files_rejected)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute intake targets for a directory of per-user CSV files.")
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns of user CSVs")
+    parser.add_argument("-o", "--output", required=True, help="consolidated results CSV to write")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("-c", "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="files per batch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = find_user_files(args.inputs)
+    summary = run_batch(paths, args.output, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Processed {summary['files']} files ({summary['rows']} rows, {summary['rows_rejected']} rows rejected, "
+        f"{len(summary['files_rejected'])} files rejected) in {elapsed:.2f}s -> {args.output}"
+    )
+    for path in summary["files_rejected"][:20]:
+        print(f"  rejected: {path}")
+
+if __name__ == "__main__":
+    main()
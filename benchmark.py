@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+# Benchmarks for the parsing and intake hot paths of test2.
+# Synthetic rosters (shaped like Anna.csv) and food catalogs (shaped like
+# food_content.csv, with unit strings) are generated once per size. Each
+# (benchmark, size) case then runs in a fresh process, so its peak RSS is its
+# own. Results are written as JSON tagged with the git commit, and can be
+# compared against an earlier run with --compare.
+#
+#   python benchmark.py --sizes 1k,10k,100k,1M -o bench.json
+#   python benchmark.py --sizes 1M --compare bench.json
+
+BENCHMARKS = ["process_user_data_file", "process_food_file", "intake_targets", "totals_percentages"]
+DEFAULT_SIZES = "1k,10k,100k,1M"
+FOOD_NAMES = ["Chicken Cutlet", "Low Sodium Soy Sauce", "Kombu", "Cucumber", "Rice", "Tofu", "Cream", "Eggs"]
+
+# Function to turn "1k" / "10M" style sizes into integers
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+# Function to write a synthetic user roster like Anna.csv
+def make_roster(n, path, seed=0):
+    rng = np.random.default_rng(seed)
+    roster = pd.DataFrame({
+        "name": "user" + pd.Series(np.arange(n)).astype(str),
+        "gender": rng.choice(["male", "female", "m", "f"], n),
+        "age": rng.integers(1, 90, n),
+        "weight": rng.integers(30, 120, n),
+        "height": rng.integers(120, 200, n),
+    })
+    roster.to_csv(path, index=False)
+
+# Function to write a synthetic food catalog like food_content.csv
+def make_food_catalog(n, path, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def with_unit(values, unit):
+        return pd.Series(values).round(1).astype(str) + unit
+
+    catalog = pd.DataFrame({
+        "Content": pd.Series(rng.choice(FOOD_NAMES, n)) + " " + pd.Series(np.arange(n)).astype(str),
+        "Weight": with_unit(rng.integers(1, 300, n), "g"),
+        "sodium": np.where(rng.random(n) < 0.5, "0", with_unit(rng.uniform(0, 200, n), "mg")),
+        "calories": with_unit(rng.uniform(0, 400, n), " kcal"),
+        "carbohydrates": with_unit(rng.uniform(0, 60, n), "g"),
+        "fat": with_unit(rng.uniform(0, 15, n), "g"),
+        "protein": with_unit(rng.uniform(0, 35, n), "g"),
+        "sugar": with_unit(rng.uniform(0, 10, n), "g"),
+        "dietary_fiber": "0g",
+    })
+    catalog.to_csv(path, index=False)
+
+# Function to read this process's peak RSS in MB
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Function run in a fresh process: set up, then time one benchmark
+def run_case(benchmark, rows, roster_path, food_path, repeat):
+    import test2
+    from food_parser import clean_food_data
+    from intake_engine import clean_user_data, compute_intake_targets, format_intake_results
+    from meal_matrix import meal_totals, percentage_tensor, target_matrix
+
+    if benchmark == "process_user_data_file":
+        def stage():
+            test2.process_user_data_file(roster_path)
+    elif benchmark == "process_food_file":
+        def stage():
+            test2.process_food_file(food_path)
+    elif benchmark == "intake_targets":
+        user_data = clean_user_data(pd.read_csv(roster_path))
+
+        def stage():
+            format_intake_results(user_data, compute_intake_targets(user_data))
+    elif benchmark == "totals_percentages":
+        targets = target_matrix(compute_intake_targets(clean_user_data(pd.read_csv(roster_path))))
+        food_data = clean_food_data(pd.read_csv(food_path))
+
+        def stage():
+            percentage_tensor(targets, meal_totals([food_data]))
+    else:
+        raise ValueError(f"Unknown benchmark: {benchmark}")
+
+    setup_rss = peak_rss_mb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "benchmark": benchmark,
+        "rows": rows,
+        "seconds": best,
+        "mean_seconds": sum(timings) / len(timings),
+        "rows_per_sec": rows / best if best > 0 else None,
+        "setup_rss_mb": round(setup_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+# Function to describe the code and machine a run was made on
+def run_metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+# Function to run every selected benchmark at every size
+def run_suite(sizes, benchmarks, repeat=3):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            roster_path = os.path.join(tmp, f"roster_{rows}.csv")
+            food_path = os.path.join(tmp, f"food_{rows}.csv")
+            make_roster(rows, roster_path)
+            make_food_catalog(rows, food_path)
+            for benchmark in benchmarks:
+                # One process per case so peak RSS isn't inherited from earlier cases
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                    result = pool.submit(run_case, benchmark, rows, roster_path, food_path, repeat).result()
+                results.append(result)
+                print(
+                    f"{benchmark:<24} {rows:>10} rows  {result['seconds']:>9.4f}s  "
+                    f"{result['rows_per_sec']:>14,.0f} rows/s  peak {result['peak_rss_mb']:>8.1f} MB"
+                )
+    return results
+
+# Function to print how a run compares with an earlier results file
+def compare(results, baseline_file):
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    previous = {(r["benchmark"], r["rows"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline_file} (commit {baseline['metadata'].get('commit')}):")
+    for result in results:
+        old = previous.get((result["benchmark"], result["rows"]))
+        if old is None:
+            continue
+        speedup = old["seconds"] / result["seconds"] if result["seconds"] > 0 else float("inf")
+        rss_change = result["peak_rss_mb"] - old["peak_rss_mb"]
+        print(
+            f"{result['benchmark']:<24} {result['rows']:>10} rows  {old['seconds']:.4f}s -> {result['seconds']:.4f}s "
+            f"({speedup:.2f}x)  peak RSS {rss_change:+.1f} MB"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parsing and intake hot paths.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts, e.g. 1k,100k,10M")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="comma-separated benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed repetitions per case (best is reported)")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    benchmarks = [name.strip() for name in args.benchmarks.split(",")]
+    results = run_suite(sizes, benchmarks, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"metadata": run_metadata(), "results": results}, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
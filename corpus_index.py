@@ -0,0 +1,256 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import zlib
+from collections import Counter
+from multiprocessing import Pool
+
+import numpy as np
+
+from article_classifier import (
+    CATEGORIES, CLASSIFIED_FILE, COMMON_WORDS_FILE, DEFAULT_CHUNK_SIZE, DISTRIBUTION_FILE, POOL_CHUNK_SIZE,
+    analyze_tokens, article_text, category_scores, doc_id_from_path, dominant_categories, init_worker,
+    format_word_table, keyword_phrases, tokenize, write_distribution,
+)
+
+# Persistent, incremental index for article_classifier.
+# One SQLite file holds, per article: its content hash, file size and mtime,
+# word counts, category scores and its ready-made report entries (the common
+# words table and the zlib-compressed classified CSV row with the cleaned text),
+# plus an inverted index of (term, article, count) postings. A run only stats the folder:
+# files whose size and mtime match the index are skipped without being read,
+# files whose stat changed are hashed (in the worker pool) and only re-tokenized
+# when the content really changed, and files that are gone are dropped. The
+# category distribution, common words and classified CSV are then written from
+# the index, so re-running after adding a few articles costs seconds however
+# large the corpus is. Changing the keyword lists re-indexes everything.
+#
+#   python corpus_index.py ConvertedFiles "analysis result" --index corpus.sqlite
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_FILE = "corpus_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT,
+    category TEXT NOT NULL,
+    scores TEXT NOT NULL,
+    word_table TEXT NOT NULL,
+    term_ids BLOB NOT NULL,
+    csv_row BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    document INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, document)
+) WITHOUT ROWID;
+"""
+
+# Function to hash an article's bytes
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Function to fingerprint the keyword lists, so changing them re-indexes
+def keywords_hash(categories):
+    return content_hash(json.dumps(categories, sort_keys=True).encode("utf-8"))
+
+# Function to hash and, if changed, analyze one article (runs in a worker process)
+# task is (path, hash stored in the index or None). Returns (path, hash, None)
+# when the content is unchanged, else (path, hash, (text, words, counts, top words, hits)).
+def index_file(task):
+    path, known_hash = task
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = content_hash(data)
+    if digest == known_hash:
+        return path, digest, None
+    tokens = tokenize(article_text(data))
+    word_counts, top_words, hits = analyze_tokens(tokens)
+    return path, digest, (" ".join(tokens), list(word_counts), list(word_counts.values()), top_words, hits)
+
+class CorpusIndex:
+    def __init__(self, path, categories=CATEGORIES):
+        self.categories = categories
+        self.category_names = list(categories)
+        self.phrases, self.phrase_categories = keyword_phrases(categories)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.terms = None
+        meta = dict(self.db.execute("SELECT key, value FROM meta"))
+        if meta.get("version", str(INDEX_VERSION)) != str(INDEX_VERSION):
+            raise ValueError(f"Unsupported corpus index version: {meta['version']}")
+        if meta.get("keywords") != keywords_hash(categories):
+            # Scores are stale: forget every hash so each article is analyzed again
+            self.db.execute("UPDATE documents SET hash = NULL")
+            self.db.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("version", str(INDEX_VERSION)), ("keywords", keywords_hash(categories))],
+            )
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # Function to map terms to ids, adding new ones (the vocabulary loads on first use)
+    def _term_ids(self, words):
+        if self.terms is None:
+            self.terms = dict((term, term_id) for term_id, term in self.db.execute("SELECT id, term FROM terms"))
+        new_terms = [word for word in dict.fromkeys(words) if word not in self.terms]
+        if new_terms:
+            first = len(self.terms) + 1
+            self.terms.update(zip(new_terms, range(first, first + len(new_terms))))
+            self.db.executemany("INSERT INTO terms (id, term) VALUES (?, ?)", [(self.terms[term], term) for term in new_terms])
+        return [self.terms[word] for word in words]
+
+    # Function to drop an article's postings, using the term ids stored with it
+    def _delete_postings(self, document):
+        row = self.db.execute("SELECT term_ids FROM documents WHERE id = ?", (document,)).fetchone()
+        term_ids = np.frombuffer(row[0], dtype=np.int64).tolist()
+        self.db.executemany("DELETE FROM postings WHERE term_id = ? AND document = ?", [(term_id, document) for term_id in term_ids])
+
+    # Function to store a chunk of analyzed articles
+    # chunk holds (doc_id, stat, hash, analysis); stored maps doc_id to its index row.
+    def _store(self, chunk, stored):
+        scores = category_scores([analysis[4] for _, _, _, analysis in chunk], self.phrase_categories, len(self.category_names))
+        labels = dominant_categories(scores, self.category_names)
+        for (doc_id, stat, digest, (text, words, counts, top_words, _)), label, doc_scores in zip(chunk, labels, scores.tolist()):
+            term_ids = self._term_ids(words)
+            # Empty articles get no common words entry, as in article_classifier
+            word_table = f"Document ID: {doc_id} \n{format_word_table(top_words)}\n" if text else ""
+            csv_row = io.StringIO()
+            csv.writer(csv_row, quoting=csv.QUOTE_ALL).writerow([doc_id, text, label])
+            values = (
+                stat.st_size, stat.st_mtime_ns, digest, label, json.dumps(doc_scores), word_table,
+                np.array(term_ids, dtype=np.int64).tobytes(), zlib.compress(csv_row.getvalue().encode("utf-8")),
+            )
+            if doc_id in stored:
+                document = stored[doc_id][0]
+                self._delete_postings(document)
+                self.db.execute(
+                    "UPDATE documents SET size = ?, mtime_ns = ?, hash = ?, category = ?, scores = ?, word_table = ?, term_ids = ?, csv_row = ? WHERE id = ?",
+                    values + (document,),
+                )
+            else:
+                document = self.db.execute(
+                    "INSERT INTO documents (doc_id, size, mtime_ns, hash, category, scores, word_table, term_ids, csv_row) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (doc_id,) + values,
+                ).lastrowid
+            self.db.executemany("INSERT INTO postings (term_id, document, count) VALUES (?, ?, ?)", zip(term_ids, [document] * len(term_ids), counts))
+        self.db.commit()
+
+    # Function to bring the index up to date with a folder of .txt articles
+    # Returns counts of added, changed, unchanged and removed articles.
+    def update(self, input_dir, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        files = {
+            doc_id_from_path(entry.name): (entry.path, entry.stat())
+            for entry in os.scandir(input_dir)
+            if entry.name.endswith(".txt") and entry.is_file()
+        }
+        stored = {
+            doc_id: (document, size, mtime_ns, digest)
+            for document, doc_id, size, mtime_ns, digest in self.db.execute("SELECT id, doc_id, size, mtime_ns, hash FROM documents")
+        }
+        report = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+        tasks = []
+        for doc_id, (path, stat) in sorted(files.items(), key=lambda item: item[0] + ".txt"):
+            known = stored.get(doc_id)
+            if known is not None and known[3] is not None and (known[1], known[2]) == (stat.st_size, stat.st_mtime_ns):
+                report["unchanged"] += 1
+            else:
+                tasks.append((path, known[3] if known is not None else None))
+
+        if tasks:
+            with Pool(workers, initializer=init_worker, initargs=(self.phrases,)) as pool:
+                chunk = []
+                for path, digest, analysis in pool.imap(index_file, tasks, chunksize=POOL_CHUNK_SIZE):
+                    doc_id = doc_id_from_path(path)
+                    stat = files[doc_id][1]
+                    if analysis is None:
+                        # Touched but not changed: only remember the new stat
+                        self.db.execute("UPDATE documents SET size = ?, mtime_ns = ? WHERE id = ?", (stat.st_size, stat.st_mtime_ns, stored[doc_id][0]))
+                        report["unchanged"] += 1
+                        continue
+                    report["changed" if doc_id in stored else "added"] += 1
+                    chunk.append((doc_id, stat, digest, analysis))
+                    if len(chunk) >= chunk_size:
+                        self._store(chunk, stored)
+                        chunk = []
+                if chunk:
+                    self._store(chunk, stored)
+
+        for doc_id in stored.keys() - files.keys():
+            document = stored[doc_id][0]
+            self._delete_postings(document)
+            self.db.execute("DELETE FROM documents WHERE id = ?", (document,))
+            report["removed"] += 1
+        self.db.commit()
+        return report
+
+    # Number of articles in each category
+    def distribution(self):
+        return Counter(dict(self.db.execute("SELECT category, COUNT(*) FROM documents GROUP BY category")))
+
+    # Articles using a term, most uses first, as (doc_id, count)
+    def term_documents(self, term, limit=None):
+        rows = self.db.execute(
+            "SELECT d.doc_id, p.count FROM terms t JOIN postings p ON p.term_id = t.id JOIN documents d ON d.id = p.document"
+            " WHERE t.term = ? ORDER BY p.count DESC, d.doc_id LIMIT ?",
+            (term, -1 if limit is None else limit),
+        )
+        return rows.fetchall()
+
+    # Function to write the classifier's reports from the index
+    # Articles come in file name order, as classify_folder writes them.
+    def write_reports(self, output_dir, articles=True):
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, COMMON_WORDS_FILE), "w", encoding="utf-8") as words_file:
+            words_file.writelines(word_table for word_table, in self.db.execute("SELECT word_table FROM documents ORDER BY doc_id || '.txt'"))
+        if articles:
+            with open(os.path.join(output_dir, CLASSIFIED_FILE), "wb") as classified_file:
+                classified_file.write(b'"doc_id","text","category"\r\n')
+                classified_file.writelines(zlib.decompress(csv_row) for csv_row, in self.db.execute("SELECT csv_row FROM documents ORDER BY doc_id || '.txt'"))
+        distribution = self.distribution()
+        write_distribution(distribution, os.path.join(output_dir, DISTRIBUTION_FILE))
+        return distribution
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally index and classify .txt articles by aging keyword category.")
+    parser.add_argument("input_dir", help="folder with the .txt articles")
+    parser.add_argument("output_dir", help="folder for the classified CSV and common words")
+    parser.add_argument("--index", default=DEFAULT_INDEX_FILE, help="SQLite index file (created if missing)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--no-articles", action="store_true", help="skip rewriting the classified articles CSV")
+    parser.add_argument("--term", help="also list the articles using this word most")
+    args = parser.parse_args()
+    index = CorpusIndex(args.index)
+    try:
+        report = index.update(args.input_dir, args.workers)
+        print(", ".join(f"{count} {name}" for name, count in report.items()) + " articles")
+        distribution = index.write_reports(args.output_dir, articles=not args.no_articles)
+        total = sum(distribution.values())
+        for category, count in distribution.most_common():
+            print(f"{category}: {count} ({count / total * 100:.1f}%)")
+        if args.term:
+            # Look the word up as it was indexed (lower-cased, punctuation removed)
+            term = " ".join(tokenize(args.term))
+            for doc_id, count in index.term_documents(term, limit=10):
+                print(f"{doc_id}\t{count}")
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
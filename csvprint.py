@@ -1,8 +1,8 @@
 import streamlit as st
-import pandas as pd
+from remote_csv import RemoteCSVCache, build_url
 
-# URL to the raw CSV file on GitHub
-CSV_URL = "https://raw.githubusercontent.com/lab-Kason/GEN/main/food_content.csv"
+# URL to the raw CSV file on GitHub (override the base with CSV_BASE_URL)
+CSV_URL = build_url("food_content.csv")
 
 # Set the page layout to wide for better use of screen space
 st.set_page_config(page_title="CSV Viewer", layout="wide")
@@ -11,9 +11,12 @@ st.set_page_config(page_title="CSV Viewer", layout="wide")
 def main():
     st.title("CSV Viewer with Streamlit")
 
-    # Load the CSV file from GitHub
+    # Load the CSV file from GitHub, through the local on-disk cache
     try:
-        data = pd.read_csv(CSV_URL)
+        data, status = RemoteCSVCache(CSV_URL).load()
+        if status == "stale":
+            st.warning("Could not reach the server; showing the last downloaded copy.")
+        st.caption(f"Source: {CSV_URL} ({status})")
         st.write("### CSV Data:")
         # Display the CSV content in a table with dynamic width and height
         st.dataframe(data, use_container_width=True, height=600)  # Adjust height for 16:9 ratio
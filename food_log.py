@@ -0,0 +1,237 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import sqlite3
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from food_parser import clean_food_data
+from intake_engine import compute_intake_targets
+from meal_model import NUTRIENT_COLUMNS, SCALE
+from nutrition_core import NUTRIENT_TARGETS
+from row_validation import validate_user_data
+
+# Append-only, date-partitioned food log with precomputed rolling rollups.
+# Every logged food is appended as a JSON line to entries/<YYYY-MM-DD>.jsonl and
+# never rewritten. Alongside, rollups.sqlite keeps each user's daily nutrient
+# totals and, for every window (7 and 30 days), the rolling sums ending on each
+# day. Appending food for a day only adds its contribution to that day's total
+# and to the window rows of the next 7 / 30 days, so a dashboard reads one row per
+# user instead of rescanning the history. Amounts are stored as integers in
+# millionths of a unit (as in meal_model), so adding up deltas never drifts.
+# Averages are per logged day in the window, and percentages compare them with
+# the user's daily targets (intake_engine) from their saved profile.
+#
+#   python food_log.py logs profile Anna --gender female --age 43 --weight 66 --height 162
+#   python food_log.py logs append Anna food_content.csv --date 2026-10-17
+#   python food_log.py logs dashboard --date 2026-10-17 --window 7
+
+WINDOWS = (7, 30)
+ENTRIES_DIR = "entries"
+ROLLUP_FILE = "rollups.sqlite"
+# Where the Streamlit app keeps its log
+DEFAULT_LOG_DIR = "food_log"
+
+_AMOUNTS = ", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in NUTRIENT_COLUMNS)
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS profiles (user TEXT PRIMARY KEY, gender TEXT, age REAL, weight REAL, height REAL);
+CREATE TABLE IF NOT EXISTS daily (
+    user TEXT NOT NULL, day INTEGER NOT NULL, entries INTEGER NOT NULL, {_AMOUNTS},
+    PRIMARY KEY (user, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    window_days INTEGER NOT NULL, day INTEGER NOT NULL, user TEXT NOT NULL, days_logged INTEGER NOT NULL, {_AMOUNTS},
+    PRIMARY KEY (window_days, day, user)
+) WITHOUT ROWID;
+"""
+
+# Function to turn a date (datetime.date or "YYYY-MM-DD") into a day number
+def day_number(date):
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date)
+    return date.toordinal()
+
+class FoodLog:
+    def __init__(self, log_dir, windows=WINDOWS):
+        self.log_dir = log_dir
+        self.windows = tuple(windows)
+        os.makedirs(os.path.join(log_dir, ENTRIES_DIR), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(log_dir, ROLLUP_FILE))
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # Saves (or replaces) a user's profile, checked like a one-row roster
+    def set_profile(self, user, gender, age, weight, height):
+        profile, rejections = validate_user_data(pd.DataFrame([{"name": user, "gender": gender, "age": age, "weight": weight, "height": height}]))
+        if len(rejections):
+            problems = "; ".join(f"{column} {reason}" for column, reason in zip(rejections["column"], rejections["reason"]))
+            raise ValueError(f"Invalid profile for {user}: {problems}")
+        row = profile.iloc[0]
+        self.db.execute(
+            "INSERT OR REPLACE INTO profiles (user, gender, age, weight, height) VALUES (?, ?, ?, ?, ?)",
+            (user, row["gender"], float(row["age"]), float(row["weight"]), float(row["height"])),
+        )
+        self.db.commit()
+
+    # Logs one food (nutrient values per portion) for a user on a date
+    def append(self, user, date, food, nutrients, portions=1.0):
+        self.append_entries([{"user": user, "date": date, "food": food, "nutrients": nutrients, "portions": portions}])
+
+    # Logs many foods at once; each entry is a dict like append's arguments
+    def append_entries(self, entries):
+        by_date = defaultdict(list)
+        deltas = defaultdict(lambda: [0] * (len(NUTRIENT_COLUMNS) + 1))
+        for entry in entries:
+            date = datetime.date.fromordinal(day_number(entry["date"]))
+            nutrients = {column: float(entry["nutrients"].get(column) or 0) for column in NUTRIENT_COLUMNS}
+            nutrients = {column: 0.0 if math.isnan(value) else value for column, value in nutrients.items()}
+            portions = float(entry.get("portions", 1.0))
+            record = {"user": entry["user"], "date": date.isoformat(), "food": entry.get("food", ""), "portions": portions, "nutrients": nutrients}
+            by_date[date.isoformat()].append(json.dumps(record) + "\n")
+            delta = deltas[(entry["user"], date.toordinal())]
+            delta[0] += 1
+            for i, column in enumerate(NUTRIENT_COLUMNS, 1):
+                delta[i] += round(nutrients[column] * portions * SCALE)
+        # The partitions are the source of truth, so they are written first
+        for date, lines in by_date.items():
+            with open(os.path.join(self.log_dir, ENTRIES_DIR, f"{date}.jsonl"), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        self._apply(deltas)
+
+    # Function to add (user, day) deltas to the daily totals and rolling windows
+    # deltas maps (user, day) to [entries, amount per nutrient].
+    def _apply(self, deltas):
+        amounts = ", ".join(NUTRIENT_COLUMNS)
+        placeholders = ", ".join("?" * len(NUTRIENT_COLUMNS))
+        added = ", ".join(f"{column} = {column} + excluded.{column}" for column in NUTRIENT_COLUMNS)
+        new_days = {
+            key for key in deltas
+            if self.db.execute("SELECT 1 FROM daily WHERE user = ? AND day = ?", key).fetchone() is None
+        }
+        self.db.executemany(
+            f"INSERT INTO daily (user, day, entries, {amounts}) VALUES (?, ?, ?, {placeholders})"
+            f" ON CONFLICT (user, day) DO UPDATE SET entries = entries + excluded.entries, {added}",
+            [(user, day, *delta) for (user, day), delta in deltas.items()],
+        )
+        # A day counts towards the windows ending on it and on the window - 1 days after it
+        self.db.executemany(
+            f"INSERT INTO rollups (window_days, day, user, days_logged, {amounts}) VALUES (?, ?, ?, ?, {placeholders})"
+            f" ON CONFLICT (window_days, day, user) DO UPDATE SET days_logged = days_logged + excluded.days_logged, {added}",
+            [
+                (window, day + offset, user, int((user, day) in new_days), *delta[1:])
+                for (user, day), delta in deltas.items()
+                for window in self.windows
+                for offset in range(window)
+            ],
+        )
+        self.db.commit()
+
+    # Function to recompute every total and rollup from the entry partitions
+    def rebuild(self):
+        deltas = defaultdict(lambda: [0] * (len(NUTRIENT_COLUMNS) + 1))
+        entries_dir = os.path.join(self.log_dir, ENTRIES_DIR)
+        for name in sorted(os.listdir(entries_dir)):
+            if not name.endswith(".jsonl"):
+                continue
+            with open(os.path.join(entries_dir, name), encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    delta = deltas[(record["user"], day_number(record["date"]))]
+                    delta[0] += 1
+                    for i, column in enumerate(NUTRIENT_COLUMNS, 1):
+                        delta[i] += round(record["nutrients"][column] * record["portions"] * SCALE)
+        self.db.execute("DELETE FROM daily")
+        self.db.execute("DELETE FROM rollups")
+        self._apply(deltas)
+
+    # Function to read the rollups for the window ending on a date
+    # Returns one row per user (or just the given user) with logged food in the
+    # window: days logged, daily averages per nutrient and their percentages of
+    # the user's targets (NaN without a profile or a valid target).
+    def dashboard(self, date, window=WINDOWS[0], user=None):
+        if window not in self.windows:
+            raise ValueError(f"No rollups kept for a {window}-day window (kept: {', '.join(map(str, self.windows))})")
+        query = (
+            f"SELECT r.user, r.days_logged, {', '.join('r.' + column for column in NUTRIENT_COLUMNS)},"
+            " p.gender, p.age, p.weight, p.height"
+            " FROM rollups r LEFT JOIN profiles p ON p.user = r.user"
+            " WHERE r.window_days = ? AND r.day = ? AND r.days_logged > 0"
+        )
+        parameters = (window, day_number(date))
+        if user is not None:
+            query += " AND r.user = ?"
+            parameters += (user,)
+        rows = self.db.execute(query + " ORDER BY r.user", parameters).fetchall()
+        columns = ["user", "days_logged"] + NUTRIENT_COLUMNS + ["gender", "age", "weight", "height"]
+        rollups = pd.DataFrame(rows, columns=columns)
+        days_logged = rollups["days_logged"].to_numpy(dtype=np.float64)
+        dashboard = pd.DataFrame({"Name": rollups["user"], "Days Logged": rollups["days_logged"]})
+        profiles = rollups[["gender", "age", "weight", "height"]].astype({"gender": object})
+        targets = compute_intake_targets(profiles.fillna({"gender": ""}))
+        for name, (food, target) in NUTRIENT_TARGETS.items():
+            averages = rollups[food].to_numpy(dtype=np.float64) / SCALE / np.maximum(days_logged, 1)
+            dashboard[f"{name} avg"] = np.round(averages, 2)
+            target_values = targets[target].to_numpy(dtype=np.float64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                percentages = np.where(targets["valid"] & (target_values > 0), averages / target_values * 100, np.nan)
+            dashboard[f"{name} %"] = np.round(percentages, 2)
+        return dashboard
+
+    # One user's rollup for the window ending on a date, as a dict (None without data)
+    def rollup(self, user, date, window=WINDOWS[0]):
+        rows = self.dashboard(date, window, user)
+        return rows.iloc[0].to_dict() if len(rows) else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Append-only food log with rolling 7/30-day nutrient rollups.")
+    parser.add_argument("log_dir", help="folder holding the log (created if missing)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    profile_parser = subparsers.add_parser("profile", help="save a user's profile for the targets")
+    profile_parser.add_argument("user")
+    for option, kind in [("--gender", str), ("--age", float), ("--weight", float), ("--height", float)]:
+        profile_parser.add_argument(option, type=kind, required=True)
+    append_parser = subparsers.add_parser("append", help="log every food of a food content CSV for a user")
+    append_parser.add_argument("user")
+    append_parser.add_argument("foods", help="food content CSV")
+    append_parser.add_argument("--date", default=datetime.date.today().isoformat(), help="YYYY-MM-DD (default: today)")
+    append_parser.add_argument("--portions", type=float, default=1.0, help="portions of each food")
+    dashboard_parser = subparsers.add_parser("dashboard", help="print every user's rollup for a window")
+    dashboard_parser.add_argument("--date", default=datetime.date.today().isoformat(), help="last day of the window")
+    dashboard_parser.add_argument("--window", type=int, default=WINDOWS[0], choices=WINDOWS)
+    dashboard_parser.add_argument("--output", help="write the dashboard to this CSV instead of printing it")
+    subparsers.add_parser("rebuild", help="recompute the rollups from the logged entries")
+    args = parser.parse_args()
+    log = FoodLog(args.log_dir)
+    try:
+        if args.command == "profile":
+            log.set_profile(args.user, args.gender, args.age, args.weight, args.height)
+            print(f"Saved profile for {args.user}")
+        elif args.command == "append":
+            food_data = clean_food_data(pd.read_csv(args.foods))
+            names = food_data["content"] if "content" in food_data.columns else pd.Series([""] * len(food_data))
+            log.append_entries([
+                {"user": args.user, "date": args.date, "food": name, "nutrients": nutrients, "portions": args.portions}
+                for name, nutrients in zip(names, food_data[NUTRIENT_COLUMNS].to_dict("records"))
+            ])
+            print(f"Logged {len(food_data)} foods for {args.user} on {args.date}")
+        elif args.command == "dashboard":
+            dashboard = log.dashboard(args.date, args.window)
+            if args.output:
+                dashboard.to_csv(args.output, index=False)
+                print(f"Wrote {len(dashboard)} users to {args.output}")
+            else:
+                print(dashboard.to_string(index=False))
+        else:
+            log.rebuild()
+            print("Rebuilt the rollups from the logged entries")
+    finally:
+        log.close()
+
+if __name__ == "__main__":
+    main()
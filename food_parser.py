@@ -0,0 +1,83 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Unit-aware parser for the nutrient columns of a food content CSV.
+# Cells look like "150mg", "0.036g", "165 kcal", "1,200mg" or a bare "0". Every nutrient is
+# converted to its canonical unit, so "0.036g" of sodium becomes 36 mg instead of
+# being read as 0.036 mg. All nutrient columns are decoded in one pass: the cells
+# are stacked, factorized, and only the distinct strings go through the regex.
+
+# Bump when parsing/cleaning output changes, so cached parses are invalidated
+PARSER_VERSION = 3
+
+NUTRIENT_UNITS = {
+    "sodium": "mg",
+    "calories": "kcal",
+    "carbohydrates": "g",
+    "fat": "g",
+    "protein": "g",
+    "sugar": "g",
+    "dietary_fiber": "g",
+}
+
+REQUIRED_COLUMNS = ["sodium", "calories", "carbohydrates", "fat", "protein", "sugar"]
+
+UNITS = ["", "mg", "g", "kcal", "ml"]
+
+# Conversion factor from each unit to the canonical unit ("" means no unit given)
+# Liquids are counted at 1 g per ml; units that make no sense for a column are rejected.
+UNIT_FACTORS = {
+    "mg": {"": 1.0, "mg": 1.0, "g": 1000.0},
+    "g": {"": 1.0, "mg": 0.001, "g": 1.0, "ml": 1.0},
+    "kcal": {"": 1.0, "kcal": 1.0},
+}
+
+# Thousands separators are only accepted in groups of three ("1,200", not "1,2")
+VALUE_PATTERN = re.compile(r"^\s*([-+]?(?:\d{1,3}(?:,\d{3})+(?:\.\d*)?|\d+\.?\d*|\.\d+))\s*(mg|g|kcal|ml)?\s*$", re.IGNORECASE)
+
+# Function to parse each distinct cell into a number and a unit code
+def _parse_distinct(values):
+    numbers = np.full(len(values) + 1, np.nan)
+    unit_codes = np.full(len(values) + 1, -1, dtype=np.int8)
+    for i, value in enumerate(values):
+        match = VALUE_PATTERN.match(value)
+        if match:
+            numbers[i] = float(match.group(1).replace(",", ""))
+            unit_codes[i] = UNITS.index((match.group(2) or "").lower())
+    # The extra trailing slot is where factorize's -1 (missing) codes land
+    return numbers, unit_codes
+
+# Function to build the (column, unit) -> factor table for the given columns
+def _factor_table(columns):
+    table = np.full((len(columns), len(UNITS)), np.nan)
+    for row, column in enumerate(columns):
+        for unit, factor in UNIT_FACTORS[NUTRIENT_UNITS[column]].items():
+            table[row, UNITS.index(unit)] = factor
+    return table
+
+# Function to parse nutrient columns into numbers in their canonical units
+# Cells that can't be parsed, or carry a unit the column can't use, become NaN.
+def parse_nutrient_columns(food_data, columns):
+    n_rows = len(food_data)
+    stacked = pd.concat([food_data[column].astype(str) for column in columns], ignore_index=True)
+    codes, distinct = pd.factorize(stacked)
+    numbers, unit_codes = _parse_distinct(distinct)
+    values = numbers[codes]
+    units = unit_codes[codes]
+    column_index = np.repeat(np.arange(len(columns)), n_rows)
+    factors = _factor_table(columns)[column_index, units]
+    factors[units < 0] = np.nan
+    parsed = (values * factors).reshape(len(columns), n_rows)
+    for i, column in enumerate(columns):
+        food_data[column] = parsed[i]
+    return food_data
+
+# Function to clean a raw food content table (as in test2.process_food_file)
+# Missing nutrients count as 0; rows with unparseable ones are dropped (see
+# row_validation.validate_food_data for the rejection table).
+def clean_food_data(food_data, required_columns=REQUIRED_COLUMNS):
+    # Imported here: row_validation builds on this module
+    from row_validation import validate_food_data
+    return validate_food_data(food_data, required_columns)[0]
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Prefix and fuzzy search over food names.
+# Names are lower-cased with whitespace collapsed and kept as one UTF-8 byte
+# buffer. The prefix index is a flattened trie: the first KEY_BYTES bytes of the
+# name from every word start, sorted, so all names with a word starting with the
+# query are one contiguous range found with two binary searches ("soy sau" finds
+# "Low Sodium Soy Sauce"). The fuzzy index is an inverted index of byte trigrams
+# (postings stored CSR-style) scored by trigram overlap, so typos such as
+# "chiken cutlet" still match. Both are plain arrays built with NumPy, saved as
+# .npy files and opened with mmap_mode="r", so a saved index loads instantly.
+
+INDEX_VERSION = 1
+KEY_BYTES = 24
+MIN_FUZZY_SCORE = 0.3
+DEFAULT_LIMIT = 10
+
+# Function to normalize a food name (or query) for searching
+def normalize_name(name):
+    return " ".join(str(name).lower().split())
+
+# Function to join normalized names into one byte buffer plus offsets
+def _encode_names(names):
+    encoded = [normalize_name(name).encode("utf-8") for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+# Function to list the distinct byte trigrams of each padded name
+# Returns (gram ids, rows) with one entry per distinct (row, trigram) pair.
+def _trigrams(buffer, offsets):
+    lengths = np.diff(offsets)
+    padded_lengths = lengths + 3
+    padded_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(padded_lengths, out=padded_offsets[1:])
+    # Each name becomes "  name " so word starts and ends form trigrams too
+    padded = np.full(padded_offsets[-1], ord(" "), dtype=np.int64)
+    rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+    padded[np.arange(len(buffer)) - offsets[rows] + padded_offsets[rows] + 2] = buffer
+    ends = np.repeat(padded_offsets[1:], padded_lengths)
+    starts = np.flatnonzero(np.arange(len(padded)) + 3 <= ends)
+    grams = (padded[starts] << 16) | (padded[starts + 1] << 8) | padded[starts + 2]
+    gram_rows = np.searchsorted(padded_offsets, starts, side="right") - 1
+    pairs = np.sort((gram_rows << 24) | grams)
+    pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+    return pairs & 0xFFFFFF, pairs >> 24
+
+class FoodSearch:
+    def __init__(self, arrays):
+        self.names = arrays["names"]
+        self.offsets = arrays["offsets"]
+        self.prefix_keys = arrays["prefix_keys"]
+        self.prefix_rows = arrays["prefix_rows"]
+        self.prefix_first = arrays["prefix_first"]
+        self.gram_keys = arrays["gram_keys"]
+        self.gram_offsets = arrays["gram_offsets"]
+        self.gram_rows = arrays["gram_rows"]
+        self.gram_counts = arrays["gram_counts"]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # Builds the index in memory from a sequence of food names
+    @classmethod
+    def build(cls, names):
+        names_buffer, offsets = _encode_names(names)
+        lengths = np.diff(offsets)
+        rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        # Word starts: first byte of each name and every byte after a space
+        positions = np.arange(len(names_buffer))
+        previous = np.concatenate([[ord(" ")], names_buffer])[:len(names_buffer)]
+        word_starts = positions[(positions == offsets[rows]) | (previous == ord(" "))]
+        start_rows = rows[word_starts]
+        gather = word_starts[:, None] + np.arange(KEY_BYTES)
+        inside = gather < offsets[start_rows + 1][:, None]
+        key_bytes = np.where(inside, names_buffer[np.minimum(gather, max(len(names_buffer) - 1, 0))], 0).astype(np.uint8)
+        keys = np.ascontiguousarray(key_bytes).view(f"S{KEY_BYTES}").reshape(-1)
+        order = np.argsort(keys, kind="stable")
+
+        grams, gram_rows = _trigrams(names_buffer, offsets)
+        gram_order = np.argsort(grams, kind="stable")
+        sorted_grams = grams[gram_order]
+        gram_starts = np.flatnonzero(np.concatenate([[True], sorted_grams[1:] != sorted_grams[:-1]]))
+        gram_keys = sorted_grams[gram_starts]
+        return cls({
+            "names": names_buffer,
+            "offsets": offsets,
+            "prefix_keys": keys[order],
+            "prefix_rows": start_rows[order].astype(np.int32),
+            "prefix_first": (word_starts == offsets[start_rows])[order],
+            "gram_keys": gram_keys.astype(np.uint32),
+            "gram_offsets": np.append(gram_starts, len(grams)).astype(np.int64),
+            "gram_rows": gram_rows[gram_order].astype(np.int32),
+            "gram_counts": np.bincount(gram_rows, minlength=len(lengths)).astype(np.int32),
+        })
+
+    def save(self, index_dir):
+        os.makedirs(index_dir, exist_ok=True)
+        arrays = vars(self)
+        for name, values in arrays.items():
+            np.save(os.path.join(index_dir, f"{name}.npy"), values)
+        with open(os.path.join(index_dir, "meta.json"), "w") as f:
+            json.dump({"version": INDEX_VERSION, "rows": len(self), "arrays": list(arrays)}, f)
+
+    # Opens a saved index memory-mapped
+    @classmethod
+    def load(cls, index_dir):
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] != INDEX_VERSION:
+            raise ValueError(f"Unsupported food search index version: {meta['version']}")
+        return cls({
+            name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+            for name in meta["arrays"]
+        })
+
+    def name(self, row):
+        return self.names[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    # Rows with a word starting with the query, names starting with it first
+    def prefix_search(self, query, limit=DEFAULT_LIMIT):
+        query = normalize_name(query).encode("utf-8")
+        if not query:
+            return []
+        head = query[:KEY_BYTES]
+        low = np.searchsorted(self.prefix_keys, head, side="left")
+        if len(head) == KEY_BYTES:
+            high = np.searchsorted(self.prefix_keys, head, side="right")
+        else:
+            # UTF-8 never contains 0xFF, so this sorts after every key with the prefix
+            high = np.searchsorted(self.prefix_keys, head + b"\xff", side="right")
+        rows = np.asarray(self.prefix_rows[low:high], dtype=np.int64)
+        first = np.asarray(self.prefix_first[low:high])
+        if len(query) > KEY_BYTES:
+            keep = [b" " + query in b" " + self.name(row).encode("utf-8") for row in rows]
+            rows, first = rows[keep], first[keep]
+        # Rank: whole-name prefix first, then shorter names, then catalog order
+        lengths = np.minimum(np.asarray(self.offsets[rows + 1] - self.offsets[rows]), 0xFFFF)
+        rank = np.sort((~first).astype(np.int64) << 48 | lengths << 32 | rows)
+        # A name matching at several word starts keeps only its best rank
+        _, best = np.unique(rank & 0xFFFFFFFF, return_index=True)
+        rank = rank[best]
+        if len(rank) > limit:
+            rank = rank[np.argpartition(rank, limit)[:limit]]
+        return (np.sort(rank) & 0xFFFFFFFF).tolist()
+
+    # Rows ranked by trigram overlap with the query (Jaccard score)
+    def fuzzy_search(self, query, limit=DEFAULT_LIMIT, min_score=MIN_FUZZY_SCORE):
+        buffer, offsets = _encode_names([query])
+        if not len(buffer):
+            return []
+        grams, _ = _trigrams(buffer, offsets)
+        positions = np.searchsorted(self.gram_keys, grams)
+        inside = positions < len(self.gram_keys)
+        positions = positions[inside][self.gram_keys[positions[inside]] == grams[inside]]
+        if not len(positions):
+            return []
+        postings = np.concatenate([self.gram_rows[self.gram_offsets[p]:self.gram_offsets[p + 1]] for p in positions])
+        shared = np.bincount(postings, minlength=len(self))
+        rows = np.flatnonzero(shared)
+        shared = shared[rows]
+        scores = shared / (len(grams) + self.gram_counts[rows] - shared)
+        keep = scores >= min_score
+        rows, scores = rows[keep], scores[keep]
+        if len(rows) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            rows, scores = rows[top], scores[top]
+        order = np.lexsort((rows, -scores))
+        return rows[order].tolist()
+
+    # Function to search by prefix, topped up with fuzzy matches
+    def search(self, query, limit=DEFAULT_LIMIT):
+        rows = self.prefix_search(query, limit)
+        if len(rows) < limit:
+            seen = set(rows)
+            rows += [row for row in self.fuzzy_search(query, limit) if row not in seen][:limit - len(rows)]
+        return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a food name search index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="index the Content column of a food CSV")
+    build_parser.add_argument("csv", help="food content CSV with a Content column")
+    build_parser.add_argument("index_dir", help="directory to write the index into")
+    query_parser = subparsers.add_parser("query", help="search a saved index")
+    query_parser.add_argument("index_dir")
+    query_parser.add_argument("query")
+    query_parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+    if args.command == "build":
+        names = pd.read_csv(args.csv, usecols=lambda column: column.strip().lower() == "content").iloc[:, 0].fillna("")
+        FoodSearch.build(names.to_numpy()).save(args.index_dir)
+        print(f"Indexed {len(names)} food names in {args.index_dir}")
+    else:
+        index = FoodSearch.load(args.index_dir)
+        for row in index.search(args.query, args.limit):
+            print(f"{row}\t{index.name(row)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from food_parser import NUTRIENT_UNITS, REQUIRED_COLUMNS, clean_food_data, parse_nutrient_columns
+from food_search import DEFAULT_LIMIT, FoodSearch
+
+# Columnar on-disk store for a cleaned food table.
+# Each nutrient is a float64 .npy file and each text column (Content, Weight, ...)
+# is a UTF-8 byte buffer plus an offsets array. Everything is opened with
+# np.load(mmap_mode="r"), so opening a store costs a few file opens no matter how
+# many items it holds. Content is indexed with an open-addressing hash table
+# (linear probing, load factor <= 0.5) for O(1) lookups by food name, and has a
+# prefix/fuzzy search index (see food_search) in its search/ subdirectory.
+
+STORE_VERSION = 1
+INDEX_COLUMN = "content"
+
+# Function to normalize a food name into its index key
+def name_key(name):
+    return str(name).strip().lower()
+
+# Function to hash an index key
+def key_hash(key):
+    return zlib.crc32(key.encode("utf-8"))
+
+# Function to encode a text column as one byte buffer plus offsets
+def _encode_text(values):
+    encoded = [str(value).encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return buffer, offsets
+
+# Function to place rows sorted by home slot with linear probing, on an unbounded line
+# Each row takes its home slot or the one after the previous row, whichever is
+# later: slot_i = i + max(home_j - j for j <= i), so equal names cost O(1) each.
+def _probe_positions(homes):
+    steps = np.arange(len(homes), dtype=np.int64)
+    return steps + np.maximum.accumulate(homes - steps)
+
+# Function to build the open-addressing hash index
+# Rows are placed in home-slot order in one pass; the rows that run off the end
+# of the table are then placed again from slot 0, ahead of the rows whose home
+# is 0 (at load factor <= 0.5 that can't reach the end of the table again).
+def _build_index(hashes):
+    capacity = 8
+    while capacity < 2 * len(hashes):
+        capacity *= 2
+    mask = capacity - 1
+    slots = np.full(capacity, -1, dtype=np.int64)
+    homes = hashes.astype(np.int64) & mask
+    rows = np.argsort(homes, kind="stable")
+    homes = homes[rows]
+    positions = _probe_positions(homes)
+    wrapped = positions >= capacity
+    if wrapped.any():
+        homes = np.where(wrapped, 0, homes)
+        order = np.lexsort((~wrapped, homes))
+        rows, homes = rows[order], homes[order]
+        positions = _probe_positions(homes)
+    slots[positions] = rows
+    return slots
+
+# Function to write a cleaned food table into a store directory
+def build_food_store(food_data, store_dir):
+    os.makedirs(store_dir, exist_ok=True)
+    nutrient_columns = [c for c in food_data.columns if c in NUTRIENT_UNITS]
+    text_columns = [c for c in food_data.columns if c not in NUTRIENT_UNITS]
+    for column in nutrient_columns:
+        np.save(os.path.join(store_dir, f"{column}.npy"), food_data[column].to_numpy(dtype=np.float64))
+    for column in text_columns:
+        buffer, offsets = _encode_text(food_data[column].fillna("").to_numpy())
+        np.save(os.path.join(store_dir, f"{column}.bytes.npy"), buffer)
+        np.save(os.path.join(store_dir, f"{column}.offsets.npy"), offsets)
+    if INDEX_COLUMN in text_columns:
+        keys = [name_key(name) for name in food_data[INDEX_COLUMN].fillna("")]
+        hashes = np.fromiter((key_hash(key) for key in keys), dtype=np.uint32, count=len(keys))
+        np.save(os.path.join(store_dir, "index.hashes.npy"), hashes)
+        np.save(os.path.join(store_dir, "index.slots.npy"), _build_index(hashes))
+        FoodSearch.build(keys).save(os.path.join(store_dir, "search"))
+    meta = {
+        "version": STORE_VERSION,
+        "rows": len(food_data),
+        "columns": list(food_data.columns),
+        "nutrient_columns": nutrient_columns,
+        "text_columns": text_columns,
+    }
+    with open(os.path.join(store_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+# Function to convert a food content CSV into a store directory
+def convert_csv(csv_file, store_dir):
+    food_data = clean_food_data(pd.read_csv(csv_file))
+    # Optional nutrients such as dietary_fiber are parsed too, not stored as text
+    extra_columns = [c for c in food_data.columns if c in NUTRIENT_UNITS and c not in REQUIRED_COLUMNS]
+    food_data = parse_nutrient_columns(food_data, extra_columns).fillna({c: 0 for c in extra_columns})
+    build_food_store(food_data, store_dir)
+    return len(food_data)
+
+class FoodStore:
+    def __init__(self, store_dir):
+        with open(os.path.join(store_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta["version"] != STORE_VERSION:
+            raise ValueError(f"Unsupported food store version: {self.meta['version']}")
+        self.store_dir = store_dir
+        self.columns = self.meta["columns"]
+        self.nutrients = {
+            column: self._load(f"{column}.npy") for column in self.meta["nutrient_columns"]
+        }
+        self.text = {
+            column: (self._load(f"{column}.bytes.npy"), self._load(f"{column}.offsets.npy"))
+            for column in self.meta["text_columns"]
+        }
+        self.index_hashes = None
+        self.index_slots = None
+        self.search_index = None
+        if os.path.exists(os.path.join(store_dir, "index.slots.npy")):
+            self.index_hashes = self._load("index.hashes.npy")
+            self.index_slots = self._load("index.slots.npy")
+        if os.path.exists(os.path.join(store_dir, "search", "meta.json")):
+            self.search_index = FoodSearch.load(os.path.join(store_dir, "search"))
+
+    def _load(self, filename):
+        return np.load(os.path.join(self.store_dir, filename), mmap_mode="r")
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def text_value(self, column, row):
+        buffer, offsets = self.text[column]
+        return buffer[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+    # Returns the row numbers whose Content matches name (case-insensitive)
+    def lookup(self, name):
+        if self.index_slots is None:
+            raise ValueError(f"Food store has no '{INDEX_COLUMN}' index")
+        key = name_key(name)
+        target = key_hash(key)
+        mask = len(self.index_slots) - 1
+        slot = target & mask
+        matches = []
+        while True:
+            row = int(self.index_slots[slot])
+            if row == -1:
+                break
+            if self.index_hashes[row] == target and name_key(self.text_value(INDEX_COLUMN, row)) == key:
+                matches.append(row)
+            slot = (slot + 1) & mask
+        return sorted(matches)
+
+    # Returns the row numbers of foods matching a partial or misspelled name
+    def search(self, query, limit=DEFAULT_LIMIT):
+        if self.search_index is None:
+            raise ValueError(f"Food store has no '{INDEX_COLUMN}' search index")
+        return self.search_index.search(query, limit)
+
+    # Materializes selected rows (or the whole store) as a DataFrame
+    def rows(self, rows=None):
+        if rows is None:
+            rows = np.arange(len(self))
+        rows = np.asarray(rows, dtype=np.int64)
+        data = {}
+        for column in self.columns:
+            if column in self.nutrients:
+                data[column] = np.asarray(self.nutrients[column][rows])
+            else:
+                data[column] = [self.text_value(column, row) for row in rows]
+        return pd.DataFrame(data, columns=self.columns)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a food content CSV into a columnar food store.")
+    parser.add_argument("csv", help="food content CSV (Content, Weight, sodium, calories, ...)")
+    parser.add_argument("store_dir", help="directory to write the store into")
+    args = parser.parse_args()
+    rows = convert_csv(args.csv, args.store_dir)
+    print(f"Wrote {rows} items to {args.store_dir}")
+
+if __name__ == "__main__":
+    main()
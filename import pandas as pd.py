@@ -1,26 +1,6 @@
 import pandas as pd
 import streamlit as st
-
-# Function to calculate BMR
-def calculate_bmr(gender, age, weight, height):
-    gender = gender.lower()
-    if gender in ["male", "m"]:
-        bmr = 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-    elif gender in ["female", "f"]:
-        bmr = 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
-    else:
-        raise ValueError("Invalid gender. Please enter 'male' or 'female'.")
-    return bmr
-
-# Function to calculate BMI
-def calculate_bmi(weight, height):
-    height_m = height / 100
-    bmi = weight / (height_m ** 2)
-    return bmi
-
-# Function to calculate percentage
-def calculate_percentage(amount, daily_intake):
-    return (amount / daily_intake) * 100
+from nutrition_core import calculate_bmi, calculate_bmr, calculate_percentage
 
 # Function to process the food content CSV
 def process_food_file(file):
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from nutrition_core import FEMALE_GENDERS, MALE_GENDERS, SUGAR_INTAKE
+from row_validation import validate_user_data
+
+# Columnar version of the per-row intake loop in test2.main.
+# Every target column is computed for the whole roster at once; rows the
+# loop would have rejected (bad gender, zero height) are flagged in a mask
+# instead of raising. On 1M rows this takes ~2 s versus ~65 s for iterrows.
+
+# Bump when parsing/cleaning output changes, so cached parses are invalidated
+PARSER_VERSION = 2
+
+RESULT_COLUMNS = [
+    "Name",
+    "Gender",
+    "Age",
+    "Weight (kg)",
+    "Height (cm)",
+    "BMR (Calories)",
+    "BMI",
+    "Sodium Intake (mg)",
+    "Fat Intake (g)",
+    "Protein Intake (g)",
+    "Carbohydrate Intake (g)",
+    "Sugar Intake (g)",
+]
+
+USER_COLUMNS = ["name", "gender", "age", "weight", "height"]
+
+# Function to clean a raw user roster (or one chunk of it)
+# Rows breaking row_validation.USER_SCHEMA are dropped; use
+# row_validation.validate_user_data to also get the rejection table.
+def clean_user_data(user_data):
+    return validate_user_data(user_data)[0]
+
+# Function to round like Python's round(x, 2)
+# np.round scales by 100 first, which can flip values sitting on a .xx5 tie,
+# so the few near-tie values are re-rounded with the builtin.
+def round_2(values):
+    values = np.asarray(values, dtype="float64")
+    rounded = np.round(values, 2)
+    with np.errstate(invalid="ignore"):
+        scaled = values * 100
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(float(v), 2) for v in values[near_tie]]
+    return rounded
+
+# Function to calculate the raw (unrounded) intake targets for every row
+def compute_intake_targets(user_data):
+    gender = user_data["gender"].astype(str).str.lower()
+    age = user_data["age"].to_numpy(dtype="float64")
+    weight = user_data["weight"].to_numpy(dtype="float64")
+    height = user_data["height"].to_numpy(dtype="float64")
+
+    is_male = gender.isin(list(MALE_GENDERS)).to_numpy()
+    is_female = gender.isin(list(FEMALE_GENDERS)).to_numpy()
+    valid = (is_male | is_female) & (height != 0)
+
+    # BMR (Harris-Benedict), gender branch picked per row
+    bmr = np.where(
+        is_male,
+        88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age),
+        447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age),
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = weight / ((height / 100) ** 2)
+
+    sodium_intake = np.where((age >= 19) & (age <= 50), 1500, 2300)
+    fat_intake = (0.30 * bmr) / 9
+    protein_min = weight * 0.8
+    protein_max = weight * 1.2
+    remaining_energy = bmr - (fat_intake * 9) - (protein_min * 4)
+    carb_intake = np.maximum(remaining_energy / 4, 0)
+
+    targets = pd.DataFrame(
+        {
+            "bmr": bmr,
+            "bmi": bmi,
+            "sodium_intake": sodium_intake,
+            "fat_intake": fat_intake,
+            "protein_min": protein_min,
+            "protein_max": protein_max,
+            "carb_intake": carb_intake,
+            "sugar_intake": SUGAR_INTAKE,
+            "valid": valid,
+        },
+        index=user_data.index,
+    )
+    return targets
+
+# Function to build the display results table from raw targets
+def format_intake_results(user_data, targets):
+    valid = targets["valid"].to_numpy()
+    users = user_data[valid]
+    targets = targets[valid]
+    protein_min = pd.Series(round_2(targets["protein_min"]), index=targets.index).astype(str)
+    protein_max = pd.Series(round_2(targets["protein_max"]), index=targets.index).astype(str)
+    results_df = pd.DataFrame(
+        {
+            "Name": users["name"],
+            "Gender": users["gender"],
+            "Age": users["age"],
+            "Weight (kg)": users["weight"],
+            "Height (cm)": users["height"],
+            "BMR (Calories)": round_2(targets["bmr"]),
+            "BMI": round_2(targets["bmi"]),
+            "Sodium Intake (mg)": targets["sodium_intake"],
+            "Fat Intake (g)": round_2(targets["fat_intake"]),
+            "Protein Intake (g)": protein_min + " - " + protein_max,
+            "Carbohydrate Intake (g)": round_2(targets["carb_intake"]),
+            "Sugar Intake (g)": targets["sugar_intake"],
+        },
+        columns=RESULT_COLUMNS,
+    )
+    return results_df.reset_index(drop=True)
+
+# Function to calculate results for a whole user roster at once
+# Returns the results table and a boolean mask of rejected input rows
+def calculate_intake_batch(user_data):
+    targets = compute_intake_targets(user_data)
+    results_df = format_intake_results(user_data, targets)
+    invalid_mask = ~targets["valid"]
+    return results_df, invalid_mask
@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+import pandas as pd
+
+from intake_engine import compute_intake_targets
+from row_validation import USER_SCHEMA, validate_record
+from target_cache import INTEGER_TARGETS
+
+# Micro-batching HTTP service for the intake calculation.
+# POST /intake with {"name", "gender", "age", "weight", "height"} returns the
+# daily intake targets. Requests arriving within max_wait of each other (up to
+# max_batch of them) are computed together in one vectorized intake_engine call.
+# GET /metrics reports request counts, p50/p99 latency and batch sizes.
+# Only the standard library is used for HTTP, so it runs anywhere locally:
+#
+#   python intake_service.py --port 8080 --max-batch 256 --max-wait-ms 5
+#   curl -d '{"gender": "female", "age": 43, "weight": 66, "height": 162}' localhost:8080/intake
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT_MS = 5
+# The roster's rules for everything but the name, which is optional here
+PROFILE_SCHEMA = {column: rules for column, rules in USER_SCHEMA.items() if column != "name"}
+TARGET_KEYS = ["bmr", "bmi", "sodium_intake", "fat_intake", "protein_min", "protein_max", "carb_intake", "sugar_intake"]
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    422: "Unprocessable Entity", 500: "Internal Server Error",
+}
+
+# Raised for well-formed requests whose values can't be used (answered with 422)
+class InvalidProfile(ValueError):
+    pass
+
+# Raised for profiles that break the roster's validation rules (answered with 400)
+class InvalidFields(ValueError):
+    def __init__(self, problems):
+        self.fields = dict(problems)
+        super().__init__("; ".join(f"{column} {reason}" for column, reason in problems))
+
+class Metrics:
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+
+    def percentile(self, values, q):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def snapshot(self):
+        latencies_ms = [latency * 1000 for latency in self.latencies]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "latency_p50_ms": self.percentile(latencies_ms, 50),
+            "latency_p99_ms": self.percentile(latencies_ms, 99),
+            "batch_size_mean": sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else None,
+            "batch_size_max": max(self.batch_sizes) if self.batch_sizes else None,
+        }
+
+class MicroBatcher:
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT_MS / 1000, metrics=None):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.metrics = metrics or Metrics()
+        self.queue = asyncio.Queue()
+
+    # Queues one profile and waits for its computed targets
+    async def submit(self, profile):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((profile, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            profiles = [profile for profile, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, compute_batch, profiles)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.metrics.batches += 1
+            self.metrics.batch_sizes.append(len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+# Function to compute targets for a batch of validated profiles at once
+def compute_batch(profiles):
+    user_data = pd.DataFrame(profiles, columns=["name", "gender", "age", "weight", "height"])
+    user_data["gender"] = user_data["gender"].str.strip().str.lower()
+    targets = compute_intake_targets(user_data)
+    results = []
+    for profile, row in zip(profiles, targets.itertuples(index=False)):
+        if not row.valid:
+            results.append(None)
+            continue
+        result = {"name": profile["name"]}
+        # Whole-number targets stay ints, as format_intake_results writes them
+        result.update({key: int(getattr(row, key)) if key in INTEGER_TARGETS else float(getattr(row, key)) for key in TARGET_KEYS})
+        results.append(result)
+    return results
+
+# Function to check a request body and turn it into a profile
+def parse_profile(body):
+    return profile_from_dict(json.loads(body or b"null"))
+
+# Function to check a decoded JSON request and turn it into a profile
+def profile_from_dict(data):
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    profile = {"name": data.get("name")}
+    if not isinstance(data.get("gender"), str):
+        raise ValueError("gender must be a string")
+    profile["gender"] = data["gender"]
+    for field in ["age", "weight", "height"]:
+        value = data.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{field} must be a number")
+        # json.loads accepts NaN and Infinity
+        if not math.isfinite(value):
+            raise InvalidProfile(f"{field} must be a finite number")
+        profile[field] = value
+    problems = validate_record(profile, PROFILE_SCHEMA)
+    if problems:
+        raise InvalidFields(problems)
+    return profile
+
+class IntakeService:
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(max_batch, max_wait_ms / 1000, self.metrics)
+
+    async def handle_request(self, method, path, body):
+        if path == "/metrics":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, self.metrics.snapshot()
+        if path != "/intake":
+            return 404, {"error": f"Unknown path: {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+        start = time.perf_counter()
+        self.metrics.requests += 1
+        try:
+            profile = parse_profile(body)
+        except InvalidProfile as e:
+            self.metrics.errors += 1
+            return 422, {"error": str(e)}
+        except ValueError as e:
+            self.metrics.errors += 1
+            payload = {"error": str(e)}
+            if isinstance(e, InvalidFields):
+                payload["fields"] = e.fields
+            return 400, payload
+        result = await self.batcher.submit(profile)
+        self.metrics.latencies.append(time.perf_counter() - start)
+        if result is None:
+            self.metrics.errors += 1
+            return 422, {"error": "Invalid gender or height. Please enter 'male' or 'female' and a non-zero height."}
+        if not all(math.isfinite(result[key]) for key in TARGET_KEYS):
+            self.metrics.errors += 1
+            return 422, {"error": "age, weight and height are out of range"}
+        return 200, result
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    status, payload = await self.handle_request(method, path.split("?")[0], body)
+                    data = json.dumps(payload, allow_nan=False).encode()
+                except Exception:
+                    # Any other failure still gets an answer
+                    self.metrics.errors += 1
+                    status, payload = 500, {"error": "Internal server error"}
+                    data = json.dumps(payload).encode()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching HTTP intake service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="largest batch computed at once")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="longest a request waits for a batch to fill")
+    args = parser.parse_args()
+    service = IntakeService(args.max_batch, args.max_wait_ms)
+    print(f"Serving intake on http://{args.host}:{args.port}/intake (metrics at /metrics)")
+    asyncio.run(service.serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()
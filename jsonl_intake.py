@@ -0,0 +1,143 @@
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+from food_parser import REQUIRED_COLUMNS, parse_nutrient_columns
+from intake_service import compute_batch, profile_from_dict
+from nutrition_core import NUTRIENT_TARGETS, calculate_percentage
+
+# Batch intake over a JSONL request log, streaming NDJSON results.
+# Each input line is one profile, optionally with the foods eaten:
+#
+#   {"name": "Anna", "gender": "female", "age": 43, "weight": 66, "height": 162,
+#    "foods": [{"content": "Rice", "calories": "260 kcal", "protein": "5g"}]}
+#
+# Lines are read and computed batch_size at a time through the vectorized intake
+# engine, and each result is written as soon as its batch is done, so memory
+# stays flat however long the log is. Food nutrients may be numbers or strings
+# with units (parsed as in food_parser; missing or unparseable ones count as 0).
+# Lines that aren't valid JSON, fail validation or have an invalid gender or
+# height are written to the reject file with the reason instead of stopping the
+# run. Use "-" for stdin/stdout:
+#
+#   zcat requests.jsonl.gz | python jsonl_intake.py - -o - --rejects rejects.jsonl
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Function to check the optional foods list of a request
+def _foods_from_dict(data):
+    foods = data.get("foods", [])
+    if not isinstance(foods, list) or not all(isinstance(food, dict) for food in foods):
+        raise ValueError("foods must be a list of objects")
+    return foods
+
+# Function to sum each request's foods into nutrient totals
+# foods_by_request is a list (one entry per request) of food lists.
+def food_totals(foods_by_request):
+    rows = [(i, food) for i, foods in enumerate(foods_by_request) for food in foods]
+    totals = np.zeros((len(foods_by_request), len(REQUIRED_COLUMNS)))
+    if rows:
+        food_data = pd.DataFrame(
+            {column: [food.get(column) for _, food in rows] for column in REQUIRED_COLUMNS},
+            dtype=object,
+        )
+        food_data = parse_nutrient_columns(food_data, REQUIRED_COLUMNS).fillna(0)
+        np.add.at(totals, np.array([i for i, _ in rows]), food_data[REQUIRED_COLUMNS].to_numpy(dtype=np.float64))
+    return totals
+
+# Function to check that every number in a record is finite (valid JSON)
+def _finite(value):
+    if isinstance(value, dict):
+        return all(_finite(item) for item in value.values())
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return True
+
+# Function to compute one batch of parsed lines into output records
+# batch holds (line number, raw line, profile, foods); returns (results, rejects).
+def process_lines(batch):
+    targets = compute_batch([profile for _, _, profile, _ in batch])
+    totals = food_totals([foods for _, _, _, foods in batch])
+    results = []
+    rejects = []
+    for (line_number, raw, _, foods), result, food_total in zip(batch, targets, totals):
+        if result is None:
+            rejects.append({"line": line_number, "error": "Invalid gender or height", "raw": raw})
+            continue
+        record = {"line": line_number}
+        record.update(result)
+        if foods:
+            food_total = dict(zip(REQUIRED_COLUMNS, food_total.tolist()))
+            record["food_totals"] = food_total
+            record["percentages"] = {
+                name: calculate_percentage(food_total[food], result[target])
+                for name, (food, target) in NUTRIENT_TARGETS.items()
+            }
+        # Huge inputs overflow to Infinity/NaN, which JSON can't hold
+        if not _finite(record):
+            rejects.append({"line": line_number, "error": "Result out of range", "raw": raw})
+            continue
+        results.append(record)
+    return results, rejects
+
+# Function to write records as NDJSON lines
+def _write_records(out, records):
+    out.writelines(json.dumps(record, allow_nan=False) + "\n" for record in records)
+    out.flush()
+
+# Function to stream a JSONL request log into NDJSON results
+# Returns the number of results written and the number of lines rejected.
+def run_jsonl(source, out, rejects_out, batch_size=DEFAULT_BATCH_SIZE):
+    written = 0
+    rejected = 0
+    batch = []
+    for line_number, line in enumerate(source, 1):
+        raw = line.decode("utf-8", errors="replace").rstrip("\r\n") if isinstance(line, bytes) else line.rstrip("\r\n")
+        if not raw.strip():
+            continue
+        try:
+            data = json.loads(line)
+            batch.append((line_number, raw, profile_from_dict(data), _foods_from_dict(data)))
+        except ValueError as e:
+            _write_records(rejects_out, [{"line": line_number, "error": str(e), "raw": raw}])
+            rejected += 1
+        if len(batch) >= batch_size:
+            results, rejects = process_lines(batch)
+            _write_records(out, results)
+            _write_records(rejects_out, rejects)
+            written += len(results)
+            rejected += len(rejects)
+            batch = []
+    if batch:
+        results, rejects = process_lines(batch)
+        _write_records(out, results)
+        _write_records(rejects_out, rejects)
+        written += len(results)
+        rejected += len(rejects)
+    return written, rejected
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute intake targets for a JSONL request log, streaming NDJSON results.")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL request file ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON results file ('-' for stdout)")
+    parser.add_argument("--rejects", default="rejects.jsonl", help="file for lines that could not be processed")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="lines computed together")
+    args = parser.parse_args()
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        with open(args.rejects, "w", encoding="utf-8") as rejects_out:
+            written, rejected = run_jsonl(source, out, rejects_out, args.batch_size)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"Wrote {written} results, rejected {rejected} lines (see {args.rejects})", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
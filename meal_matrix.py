@@ -0,0 +1,90 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from food_parser import clean_food_data
+from intake_engine import clean_user_data, compute_intake_targets
+from nutrition_core import NUTRIENT_TARGETS
+
+# Users x meals evaluation of daily-intake percentages.
+# Each meal file is summed once into a row of nutrient totals (M x K) and each
+# user's targets form a row of a target matrix (N x K); one broadcast division
+# then gives the full N x M x K percentage tensor. Targets that are not positive
+# give 0%, as calculate_percentage does in test2.
+
+NUTRIENTS = list(NUTRIENT_TARGETS)
+FOOD_COLUMNS = [food for food, _ in NUTRIENT_TARGETS.values()]
+TARGET_COLUMNS = [target for _, target in NUTRIENT_TARGETS.values()]
+
+# Function to sum each meal's nutrients into an M x K matrix
+def meal_totals(meals):
+    totals = np.zeros((len(meals), len(FOOD_COLUMNS)))
+    for i, food_data in enumerate(meals):
+        totals[i] = food_data[FOOD_COLUMNS].to_numpy(dtype=np.float64).sum(axis=0)
+    return totals
+
+# Function to turn intake targets into an N x K matrix
+def target_matrix(targets):
+    return targets[TARGET_COLUMNS].to_numpy(dtype=np.float64)
+
+# Function to compute the N x M x K percentage tensor in one broadcast
+def percentage_tensor(targets, totals):
+    targets = targets[:, None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentages = totals[None, :, :] / targets * 100
+    return np.where(targets > 0, percentages, 0.0)
+
+# Function to flatten the tensor into a tidy (user, meal, nutrient, percentage) table
+def to_long(tensor, user_names, meal_names):
+    n_users, n_meals, n_nutrients = tensor.shape
+    user_codes, users = pd.factorize(pd.Series(user_names, dtype=object))
+    meal_codes, meals = pd.factorize(pd.Series(meal_names, dtype=object))
+    return pd.DataFrame({
+        "user": pd.Categorical.from_codes(np.repeat(user_codes, n_meals * n_nutrients), users),
+        "meal": pd.Categorical.from_codes(np.tile(np.repeat(meal_codes, n_nutrients), n_users), meals),
+        "nutrient": pd.Categorical.from_codes(np.tile(np.arange(n_nutrients), n_users * n_meals), NUTRIENTS),
+        "percentage": tensor.reshape(-1),
+    })
+
+# Function to evaluate every user against every meal
+# Returns the long-format table; only valid users (see intake_engine) are included.
+def evaluate_meal_matrix(user_data, meals, meal_names):
+    targets = compute_intake_targets(user_data)
+    valid = targets["valid"].to_numpy()
+    tensor = percentage_tensor(target_matrix(targets[valid]), meal_totals(meals))
+    return to_long(tensor, user_data.loc[valid, "name"].to_numpy(), meal_names)
+
+# Function to write the long table for a large run, a block of users at a time
+def write_meal_matrix(user_data, meals, meal_names, output_file, block_users=5000):
+    totals = meal_totals(meals)
+    header = True
+    rows = 0
+    with open(output_file, "w", newline="") as out:
+        for start in range(0, len(user_data), block_users):
+            block = user_data.iloc[start:start + block_users]
+            targets = compute_intake_targets(block)
+            valid = targets["valid"].to_numpy()
+            tensor = percentage_tensor(target_matrix(targets[valid]), totals)
+            long_df = to_long(tensor, block.loc[valid, "name"].to_numpy(), meal_names)
+            long_df.to_csv(out, index=False, header=header)
+            header = False
+            rows += len(long_df)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate every user against every meal file.")
+    parser.add_argument("--users", required=True, help="user roster CSV (name, gender, age, weight, height)")
+    parser.add_argument("--meals", required=True, nargs="+", help="food content CSVs, one per meal")
+    parser.add_argument("--output", required=True, help="long-format CSV to write")
+    parser.add_argument("--block-users", type=int, default=5000, help="users per output block")
+    args = parser.parse_args()
+    user_data = clean_user_data(pd.read_csv(args.users))
+    meals = [clean_food_data(pd.read_csv(path)) for path in args.meals]
+    meal_names = [os.path.splitext(os.path.basename(path))[0] for path in args.meals]
+    rows = write_meal_matrix(user_data, meals, meal_names, args.output, args.block_users)
+    print(f"Wrote {rows} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import math
+
+from nutrition_core import NUTRIENT_TARGETS, calculate_percentage
+
+# Editable meal backed by running per-nutrient totals.
+# Adding, removing or editing an item touches only that item's contribution,
+# so every change is O(1) however big the meal or the catalog is. Totals are kept
+# as integers in millionths of a unit, which makes removing an item exactly undo
+# adding it (no floating-point drift after many edits).
+# Plain Python only, so this can be used without loading pandas.
+
+SCALE = 1_000_000
+NUTRIENT_COLUMNS = [food for food, _ in NUTRIENT_TARGETS.values()]
+
+class Meal:
+    def __init__(self, nutrients=NUTRIENT_COLUMNS):
+        self.nutrients = list(nutrients)
+        self.items = {}
+        self._totals = [0] * len(self.nutrients)
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def _values(self, values):
+        if isinstance(values, dict) or hasattr(values, "keys"):
+            values = [values[nutrient] for nutrient in self.nutrients]
+        if len(values) != len(self.nutrients):
+            raise ValueError(f"Expected {len(self.nutrients)} nutrient values, got {len(values)}")
+        return [float(value) if value is not None and not math.isnan(float(value)) else 0.0 for value in values]
+
+    def _contribution(self, values, quantity):
+        return [round(value * quantity * SCALE) for value in values]
+
+    def _apply(self, contribution, sign):
+        for i, amount in enumerate(contribution):
+            self._totals[i] += sign * amount
+
+    # Adds a food (nutrient values per portion) and returns its item id
+    def add_item(self, name, values, quantity=1.0):
+        values = self._values(values)
+        contribution = self._contribution(values, quantity)
+        item_id = self._next_id
+        self._next_id += 1
+        self.items[item_id] = {"name": name, "values": values, "quantity": quantity, "contribution": contribution}
+        self._apply(contribution, 1)
+        return item_id
+
+    def remove_item(self, item_id):
+        item = self.items.pop(item_id)
+        self._apply(item["contribution"], -1)
+
+    def edit_item(self, item_id, values=None, quantity=None):
+        item = self.items[item_id]
+        self._apply(item["contribution"], -1)
+        if values is not None:
+            item["values"] = self._values(values)
+        if quantity is not None:
+            item["quantity"] = quantity
+        item["contribution"] = self._contribution(item["values"], item["quantity"])
+        self._apply(item["contribution"], 1)
+
+    def clear(self):
+        self.items.clear()
+        self._totals = [0] * len(self.nutrients)
+
+    def totals(self):
+        return {nutrient: total / SCALE for nutrient, total in zip(self.nutrients, self._totals)}
+
+    # Percentages of the daily targets (keys as in nutrition_core.calculate_daily_intake)
+    def percentages(self, targets):
+        totals = self.totals()
+        return {
+            name: calculate_percentage(totals[food], targets[target])
+            for name, (food, target) in NUTRIENT_TARGETS.items()
+            if food in totals
+        }
@@ -0,0 +1,159 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from food_parser import clean_food_data
+from intake_engine import clean_user_data, compute_intake_targets
+from meal_matrix import FOOD_COLUMNS, NUTRIENTS, target_matrix
+
+# Portion planner: the inverse of the food percentages in test2.
+# For every user, find portion multipliers x (0 <= x <= max_portions per food)
+# so the catalog's calories, carbohydrates, fat and protein land on the user's
+# targets, while sodium and sugar stay under theirs. Each user is a bounded
+# quadratic program
+#
+#   min  1/2 |S (A x - t)|^2 + ridge/2 |x|^2 + penalty/2 sum(max(0, c.x - cap)^2)
+#
+# where A holds the goal nutrients of every food and S scales each nutrient by
+# its median target over the batch. The Hessian A'S'SA + ridge*I is the same for
+# every user, so it is eigen-decomposed once per catalog: that gives the
+# unconstrained optimum of all users in one solve (the warm start) and the step
+# size. All users are then refined together by projected accelerated gradient
+# (FISTA with per-user adaptive restart), one F x N matrix product per iteration.
+
+GOAL_NUTRIENTS = ["Calories", "Carbohydrates", "Fat", "Protein"]
+CAPPED_NUTRIENTS = ["Sodium", "Sugar"]
+DEFAULT_MAX_PORTIONS = 5.0
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_RIDGE = 1e-3
+DEFAULT_PENALTY = 100.0
+DEFAULT_ITERATIONS = 500
+DEFAULT_BLOCK_USERS = 2048
+# The factorization is O(F^3) in the number of foods, so larger catalogs are refused
+MAX_PLAN_FOODS = 500
+
+GOAL_INDEX = [NUTRIENTS.index(name) for name in GOAL_NUTRIENTS]
+CAP_INDEX = [NUTRIENTS.index(name) for name in CAPPED_NUTRIENTS]
+
+class MealPlanner:
+    def __init__(self, food_data, max_portions=DEFAULT_MAX_PORTIONS, ridge=DEFAULT_RIDGE, penalty=DEFAULT_PENALTY):
+        # Nutrients per portion, one column per food (K x F)
+        self.nutrients = food_data[FOOD_COLUMNS].to_numpy(dtype=np.float64).T
+        self.max_portions = max_portions
+        self.ridge = ridge
+        self.penalty = penalty
+
+    # Function to factor the shared Hessian for one nutrient scaling
+    def _factor(self, goal_scale):
+        goals = self.nutrients[GOAL_INDEX] / goal_scale[:, None]
+        hessian = goals.T @ goals + self.ridge * np.eye(goals.shape[1])
+        eigenvalues, eigenvectors = np.linalg.eigh(hessian)
+        return goals, hessian, eigenvalues, eigenvectors
+
+    # Function to solve every user's program at once
+    # targets is the N x K matrix from meal_matrix.target_matrix; returns N x F portions.
+    # Users are refined block_users at a time so the working arrays stay in cache
+    # and each block stops as soon as it has converged.
+    def solve(self, targets, iterations=DEFAULT_ITERATIONS, tol=1e-6, block_users=DEFAULT_BLOCK_USERS):
+        targets = np.asarray(targets, dtype=np.float64)
+        goal_scale = np.median(targets[:, GOAL_INDEX], axis=0) if len(targets) else np.ones(len(GOAL_INDEX))
+        goal_scale[goal_scale <= 0] = 1.0
+        cap_scale = np.median(targets[:, CAP_INDEX], axis=0) if len(targets) else np.ones(len(CAP_INDEX))
+        cap_scale[cap_scale <= 0] = 1.0
+        goals, hessian, eigenvalues, eigenvectors = self._factor(goal_scale)
+        caps = self.nutrients[CAP_INDEX] / cap_scale[:, None]
+        step = 1.0 / (eigenvalues[-1] + self.penalty * np.sum(caps ** 2))
+        portions = np.empty((len(targets), self.nutrients.shape[1]))
+        for start in range(0, len(targets), block_users):
+            block = targets[start:start + block_users]
+            linear = goals.T @ (block[:, GOAL_INDEX] / goal_scale).T
+            cap_limits = (block[:, CAP_INDEX] / cap_scale).T
+            # Unconstrained optimum for the block from the one factorization
+            unconstrained = eigenvectors @ ((eigenvectors.T @ linear) / eigenvalues[:, None])
+            portions[start:start + block_users] = self._refine(
+                unconstrained, hessian, linear, caps, cap_limits, step, iterations, tol
+            ).T
+        return portions
+
+    # Function to run projected FISTA (with adaptive restart) on one block of users
+    def _refine(self, portions, hessian, linear, caps, cap_limits, step, iterations, tol):
+        portions = np.clip(portions, 0, self.max_portions)
+        momentum = portions.copy()
+        t = np.ones(portions.shape[1])
+        for _ in range(iterations):
+            excess = np.maximum(caps @ momentum - cap_limits, 0)
+            gradient = hessian @ momentum - linear + self.penalty * caps.T @ excess
+            updated = np.clip(momentum - step * gradient, 0, self.max_portions)
+            delta = updated - portions
+            # Restart the momentum of users whose step turned back uphill
+            t[np.sum((momentum - updated) * delta, axis=0) > 0] = 1.0
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            momentum = updated + ((t - 1) / t_next) * delta
+            portions, t = updated, t_next
+            if not delta.size or np.max(np.abs(delta)) < tol:
+                break
+        return portions
+
+    # Function to report what each plan delivers
+    # Returns (N x K nutrient totals, N x K percentages of target, N-bool within tolerance)
+    def evaluate(self, targets, portions, tolerance=DEFAULT_TOLERANCE):
+        totals = portions @ self.nutrients.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentages = np.where(targets > 0, totals / targets * 100, 0.0)
+        goals_met = np.all(np.abs(percentages[:, GOAL_INDEX] - 100) <= tolerance * 100, axis=1)
+        caps_met = np.all(totals[:, CAP_INDEX] <= targets[:, CAP_INDEX] * (1 + 1e-6), axis=1)
+        return totals, percentages, goals_met & caps_met
+
+# Function to label foods uniquely: repeated names get " (2)", " (3)", ...
+def food_labels(food_data):
+    if "content" not in food_data.columns:
+        return [f"food {i}" for i in range(len(food_data))]
+    names = food_data["content"].astype(object).fillna("").astype(str).tolist()
+    seen = {}
+    labels = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        labels.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    # A suffixed label can still collide with a real name; number those too
+    if len(set(labels)) != len(labels):
+        labels = [f"{label} #{i}" for i, label in enumerate(labels)]
+    return labels
+
+# Function to plan portions for every valid user of a roster
+# Returns a wide table: name, one portions column per food, percentages, within_tolerance.
+# Raises ValueError for catalogs of more than max_foods foods.
+def plan_meals(user_data, food_data, max_portions=DEFAULT_MAX_PORTIONS, tolerance=DEFAULT_TOLERANCE, targets=None, max_foods=MAX_PLAN_FOODS):
+    if len(food_data) > max_foods:
+        raise ValueError(f"Meal planning supports at most {max_foods} foods, got {len(food_data)}")
+    if targets is None:
+        targets = compute_intake_targets(user_data)
+    valid = targets["valid"].to_numpy()
+    target_values = target_matrix(targets[valid])
+    planner = MealPlanner(food_data, max_portions)
+    portions = planner.solve(target_values)
+    _, percentages, within = planner.evaluate(target_values, portions, tolerance)
+    plan = pd.DataFrame(np.round(portions, 2), columns=food_labels(food_data))
+    plan.insert(0, "Name", user_data.loc[valid, "name"].to_numpy())
+    for i, nutrient in enumerate(NUTRIENTS):
+        plan[f"{nutrient} %"] = np.round(percentages[:, i], 2)
+    plan["Within Tolerance"] = within
+    return plan
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan food portions that meet every user's daily targets.")
+    parser.add_argument("--users", required=True, help="user roster CSV (name, gender, age, weight, height)")
+    parser.add_argument("--foods", required=True, help="food content CSV to plan from")
+    parser.add_argument("--output", required=True, help="CSV of portions per user")
+    parser.add_argument("--max-portions", type=float, default=DEFAULT_MAX_PORTIONS, help="most portions of any one food")
+    parser.add_argument("--max-foods", type=int, default=MAX_PLAN_FOODS, help="refuse catalogs with more foods than this")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative miss on calories, carbs, fat and protein")
+    args = parser.parse_args()
+    user_data = clean_user_data(pd.read_csv(args.users))
+    food_data = clean_food_data(pd.read_csv(args.foods))
+    plan = plan_meals(user_data, food_data, args.max_portions, args.tolerance, max_foods=args.max_foods)
+    plan.to_csv(args.output, index=False)
+    print(f"Planned {len(plan)} users, {int(plan['Within Tolerance'].sum())} within tolerance; wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Cache of parsed upload frames, keyed by a hash of the uploaded bytes.
+# Streamlit reruns the whole script on every widget change, so without this the
+# same upload is re-read and re-cleaned on every Calculate click. Entries are
+# evicted least-recently-used once the cached frames exceed max_bytes.
+# One cache is shared by every session (st.cache_resource), so the entries and
+# byte counts are only touched under a lock; frames are copied outside it.
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Function to hash the contents of an uploaded file or a path (or a list of them)
+def content_hash(source):
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (list, tuple)):
+        for part in source:
+            digest.update(content_hash(part).encode())
+    elif hasattr(source, "getvalue"):
+        digest.update(source.getvalue())
+    elif hasattr(source, "read"):
+        source.seek(0)
+        for block in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(block)
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+# Function to estimate how much memory a cached frame (or tuple of frames) holds
+def frame_nbytes(frame):
+    if isinstance(frame, tuple):
+        return sum(frame_nbytes(part) for part in frame)
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+# Function to copy a cached frame (or tuple of frames)
+def _copy(frame):
+    if isinstance(frame, tuple):
+        return tuple(part.copy() for part in frame)
+    return frame.copy()
+
+class ParseCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            frame, _ = self.entries[key]
+        return _copy(frame)
+
+    def put(self, key, frame):
+        nbytes = frame_nbytes(frame)
+        if nbytes > self.max_bytes:
+            return
+        frame = _copy(frame)
+        with self.lock:
+            if key in self.entries:
+                self.current_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (frame, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return self._stats()
+
+    def _stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+# Function to parse an upload through the cache
+# parse_fn is only called when this exact content hasn't been parsed by this
+# parser version before; failed parses (None) are not cached.
+def cached_parse(cache, source, parse_fn, version):
+    key = (content_hash(source), parse_fn.__name__, version)
+    frame = cache.get(key)
+    if frame is not None:
+        return frame
+    for part in source if isinstance(source, (list, tuple)) else [source]:
+        if hasattr(part, "seek"):
+            part.seek(0)
+    frame = parse_fn(source)
+    if frame is not None:
+        cache.put(key, frame)
+    return frame
@@ -0,0 +1,95 @@
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Per-stage timing and memory probes for the intake app.
+# Turned on with INTAKE_PERF=1. When off, stage() hands back one shared no-op
+# context manager, so the probes cost a function call and nothing else.
+# When on, each stage records wall time and its tracemalloc peak, logs one JSON
+# line to the "intake.perf" logger, and keeps the record for the "Performance"
+# panel. Records are kept per thread, i.e. per Streamlit session run.
+# tracemalloc's peak is process-wide, so it only means something for one session
+# at a time: a stage that overlaps a stage of another thread doesn't reset the
+# peak and records peak_mb as None (so do the stages it overlapped).
+
+ENABLED = os.environ.get("INTAKE_PERF", "").lower() not in ("", "0", "false", "no")
+
+logger = logging.getLogger("intake.perf")
+_local = threading.local()
+_NULL_STAGE = contextlib.nullcontext()
+# Open stages of every thread, to spot concurrent sessions
+_open_stages = set()
+_open_lock = threading.Lock()
+
+if ENABLED:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+class _Stage:
+    def __init__(self, name):
+        self.name = name
+        self.child_peak = 0
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault("stack", [])
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        self.thread = threading.get_ident()
+        with _open_lock:
+            self.shared = any(stage.thread != self.thread for stage in _open_stages)
+            if self.shared:
+                for stage in _open_stages:
+                    stage.shared = True
+            _open_stages.add(self)
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+            if not self.shared:
+                tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+        with _open_lock:
+            _open_stages.discard(self)
+        _local.stack.pop()
+        # A nested stage resets the tracemalloc peak, so pass ours up to the parent
+        if self.parent is not None:
+            self.parent.child_peak = max(self.parent.child_peak, peak)
+            self.parent.shared = self.parent.shared or self.shared
+        record = {
+            "stage": self.name,
+            "seconds": round(seconds, 6),
+            "peak_mb": None if self.shared else round(max(peak - self.start_memory, 0) / 1024 / 1024, 3),
+            "ok": exc_type is None,
+        }
+        _local.__dict__.setdefault("records", []).append(record)
+        logger.info(json.dumps(record))
+        return False
+
+# Function to start a fresh set of records (call once per app run)
+def start_run():
+    if not ENABLED:
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.records = []
+    _local.stack = []
+
+# Function to wrap one stage of work: `with stage("food read_csv"): ...`
+def stage(name):
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage(name)
+
+# Function to get the records of the current run
+def records():
+    return list(getattr(_local, "records", []))
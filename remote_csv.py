@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+# Local on-disk cache for a CSV served over HTTP (e.g. the GitHub raw URL used
+# by csvprint.py). The raw file, a pickled copy of the parsed frame and the
+# response validators are kept in cache_dir. While the copy is younger than ttl
+# seconds it is served without touching the network; after that the server is
+# asked with If-None-Match / If-Modified-Since and only a changed file is
+# downloaded and parsed again. If the server can't be reached, or sends a file
+# that doesn't parse, the last good copy is served instead of failing; a corrupt
+# metadata file just means downloading again. Every file is written under a
+# unique temporary name and renamed into place, so processes sharing cache_dir
+# never see (or clobber) each other's partial copies.
+
+DEFAULT_BASE_URL = "https://raw.githubusercontent.com/lab-Kason/GEN/main"
+DEFAULT_CACHE_DIR = ".csv_cache"
+DEFAULT_TTL = 300
+
+# Function to build the URL of a file under the configured base URL
+def build_url(filename, base_url=None):
+    base_url = base_url or os.environ.get("CSV_BASE_URL", DEFAULT_BASE_URL)
+    return f"{base_url.rstrip('/')}/{filename}"
+
+# Function to write a file atomically so readers never see a partial copy
+def _atomic_write(path, data):
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False) as f:
+        f.write(data)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+class RemoteCSVCache:
+    def __init__(self, url, cache_dir=None, ttl=None, timeout=10):
+        self.url = url
+        self.cache_dir = cache_dir or os.environ.get("CSV_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.ttl = ttl if ttl is not None else float(os.environ.get("CSV_CACHE_TTL", DEFAULT_TTL))
+        self.timeout = timeout
+        name = os.path.basename(url.split("?")[0]) or "data.csv"
+        self.raw_path = os.path.join(self.cache_dir, name)
+        self.frame_path = os.path.join(self.cache_dir, name + ".pkl")
+        self.meta_path = os.path.join(self.cache_dir, name + ".json")
+
+    def _read_meta(self):
+        if not (os.path.exists(self.meta_path) and os.path.exists(self.frame_path)):
+            return None
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except ValueError:
+            return None
+        if not isinstance(meta, dict) or meta.get("url") != self.url or not isinstance(meta.get("fetched_at"), (int, float)):
+            return None
+        return meta
+
+    def _write_meta(self, meta):
+        _atomic_write(self.meta_path, json.dumps(meta).encode())
+
+    # Parses the download before writing anything, so a bad file never replaces a good copy
+    def _store(self, body, headers):
+        data = pd.read_csv(io.BytesIO(body))
+        frame = io.BytesIO()
+        data.to_pickle(frame)
+        _atomic_write(self.raw_path, body)
+        _atomic_write(self.frame_path, frame.getvalue())
+        self._write_meta({
+            "url": self.url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        })
+        return data
+
+    # Returns the frame and how it was obtained:
+    # "fresh" (cache within ttl), "revalidated" (304), "downloaded" or "stale"
+    # (network failed or the download didn't parse)
+    def load(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = self._read_meta()
+        if meta is not None and time.time() - meta["fetched_at"] < self.ttl:
+            return pd.read_pickle(self.frame_path), "fresh"
+
+        request = urllib.request.Request(self.url)
+        if meta is not None:
+            if meta.get("etag"):
+                request.add_header("If-None-Match", meta["etag"])
+            if meta.get("last_modified"):
+                request.add_header("If-Modified-Since", meta["last_modified"])
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return self._store(response.read(), response.headers), "downloaded"
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and meta is not None:
+                meta["fetched_at"] = time.time()
+                self._write_meta(meta)
+                return pd.read_pickle(self.frame_path), "revalidated"
+            if meta is None:
+                raise
+        except (urllib.error.URLError, OSError):
+            if meta is None:
+                raise
+        except ValueError:
+            # Truncated or malformed CSV (pandas' parse errors are ValueErrors)
+            if meta is None:
+                raise
+        return pd.read_pickle(self.frame_path), "stale"
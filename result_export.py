@@ -0,0 +1,136 @@
+import gzip
+import importlib.util
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+# Incremental export of result tables to CSV or Parquet.
+# Results are written to a file in blocks of rows (or chunk by chunk when they
+# come from a streaming run), optionally gzip/zstd compressed, so exporting never
+# builds the whole file as one in-memory string. Parquet needs pyarrow and
+# zstd-compressed CSV needs zstandard; both are imported only when used.
+
+EXPORT_FORMATS = ["csv", "parquet"]
+COMPRESSIONS = [None, "gzip", "zstd"]
+DEFAULT_BLOCK_ROWS = 50_000
+
+# Function to list the compressions that can be used here (zstd needs zstandard)
+def available_compressions():
+    return [compression for compression in COMPRESSIONS if compression != "zstd" or importlib.util.find_spec("zstandard") is not None]
+
+# Function to build the download file name for a format and compression
+def export_file_name(base, fmt="csv", compression=None):
+    name = f"{base}.{fmt}"
+    if fmt == "csv" and compression == "gzip":
+        name += ".gz"
+    elif fmt == "csv" and compression == "zstd":
+        name += ".zst"
+    return name
+
+# Function to pick the MIME type for a format and compression
+def export_mime(fmt="csv", compression=None):
+    if fmt == "parquet":
+        return "application/vnd.apache.parquet"
+    if compression == "gzip":
+        return "application/gzip"
+    if compression == "zstd":
+        return "application/zstd"
+    return "text/csv"
+
+# Function to open a (possibly compressed) binary stream for CSV output
+def _open_binary(path, compression):
+    if compression is None:
+        return open(path, "wb")
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ValueError("zstd compression needs the zstandard package") from e
+        return zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+    raise ValueError(f"Unknown compression: {compression}")
+
+class ResultWriter:
+    def __init__(self, path, fmt="csv", compression=None, block_rows=DEFAULT_BLOCK_ROWS):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self.block_rows = block_rows
+        self.rows = 0
+        self._stream = None
+        self._parquet = None
+        self._schema = None
+        self._header = True
+        if fmt == "csv":
+            self._stream = io.TextIOWrapper(_open_binary(path, compression), encoding="utf-8", newline="")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # Appends one DataFrame, in blocks of block_rows
+    def write(self, frame):
+        if len(frame) == 0 and not self._header:
+            return
+        for start in range(0, max(len(frame), 1), self.block_rows):
+            block = frame.iloc[start:start + self.block_rows]
+            if self.fmt == "csv":
+                block.to_csv(self._stream, index=False, header=self._header)
+            else:
+                self._write_parquet(block)
+            self._header = False
+            self.rows += len(block)
+
+    def _write_parquet(self, block):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ValueError("Parquet export needs the pyarrow package") from e
+        table = pa.Table.from_pandas(block, preserve_index=False)
+        if self._parquet is None:
+            self._schema = table.schema
+            self._parquet = pq.ParquetWriter(self.path, self._schema, compression=self.compression or "none")
+        else:
+            table = table.cast(self._schema)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+# Function to export a DataFrame, or an iterable of DataFrame chunks, to a file
+# Writes to a new temporary file when path is None; returns the path written.
+def export_results(results, fmt="csv", compression=None, path=None, block_rows=DEFAULT_BLOCK_ROWS):
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="results_", suffix="_" + export_file_name("export", fmt, compression))
+        os.close(fd)
+    chunks = [results] if isinstance(results, pd.DataFrame) else results
+    try:
+        with ResultWriter(path, fmt, compression, block_rows) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+# Function to read an exported file back, closing it before returning
+# Used as the download button's data so the file is only read when clicked.
+def read_export(path):
+    with open(path, "rb") as f:
+        return f.read()
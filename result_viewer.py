@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+# Server-side paging for large result tables.
+# A ResultView keeps the full table on the server and hands out one page at a
+# time, so the browser only ever receives page_size rows. Sort orders are built
+# once per column (argsort) and reused for every page; a numeric range filter on
+# the sort column is two binary searches on that order, and a text filter is a
+# substring match on a lower-cased copy of the column made once. The summary
+# (counts, means, percentiles of the numeric columns) is computed once per table.
+
+DEFAULT_PAGE_SIZE = 50
+PAGE_SIZES = [25, 50, 100, 250]
+SUMMARY_PERCENTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+class ResultView:
+    def __init__(self, frame, text_column=None):
+        self.frame = frame.reset_index(drop=True)
+        self.text_column = text_column
+        self.numeric_columns = list(self.frame.select_dtypes("number").columns)
+        self._orders = {}
+        self._text = None
+        self._text_filter = (None, None)
+        self._summary = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    # Ascending row order for a column, built on first use
+    def sort_order(self, column):
+        if column not in self._orders:
+            values = self.frame[column]
+            if column in self.numeric_columns:
+                values = values.to_numpy(dtype=np.float64)
+            else:
+                values = values.astype(object).fillna("").astype(str).to_numpy(dtype=str)
+            self._orders[column] = np.argsort(values, kind="stable")
+        return self._orders[column]
+
+    # Row positions within [low, high] of a numeric column, in ascending order
+    def range_positions(self, column, low=None, high=None):
+        order = self.sort_order(column)
+        sorted_values = self.frame[column].to_numpy(dtype=np.float64)[order]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side="left")
+        stop = np.searchsorted(sorted_values, np.inf, side="right") if high is None else np.searchsorted(sorted_values, high, side="right")
+        return order[start:stop]
+
+    # Boolean mask of rows whose text column contains the query (case-insensitive)
+    def text_mask(self, query):
+        if self._text_filter[0] != query:
+            if self._text is None:
+                self._text = self.frame[self.text_column].astype(object).fillna("").astype(str).str.lower()
+            mask = self._text.str.contains(query.lower(), regex=False).to_numpy()
+            self._text_filter = (query, mask)
+        return self._text_filter[1]
+
+    # Function to get the sorted, filtered row positions
+    def positions(self, sort_by=None, descending=False, low=None, high=None, query=""):
+        if sort_by is None:
+            positions = np.arange(len(self.frame))
+        elif sort_by in self.numeric_columns and (low is not None or high is not None):
+            positions = self.range_positions(sort_by, low, high)
+        else:
+            positions = self.sort_order(sort_by)
+        if query and self.text_column is not None:
+            positions = positions[self.text_mask(query)[positions]]
+        if descending:
+            positions = positions[::-1]
+        return positions
+
+    # Function to slice one page; returns (page frame, matching rows, page count)
+    def page(self, page=1, page_size=DEFAULT_PAGE_SIZE, **filters):
+        positions = self.positions(**filters)
+        pages = max(1, -(-len(positions) // page_size))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * page_size
+        return self.frame.iloc[positions[start:start + page_size]], len(positions), pages
+
+    # Function to summarize the numeric columns (computed once per table)
+    def summary(self):
+        if self._summary is None and not self.numeric_columns:
+            self._summary = pd.DataFrame()
+        elif self._summary is None:
+            summary = self.frame[self.numeric_columns].describe(percentiles=SUMMARY_PERCENTILES).T
+            summary = summary.drop(columns=["std"]).rename(columns={"count": "count (non-empty)"})
+            summary.insert(0, "rows", len(self.frame))
+            self._summary = summary
+        return self._summary
@@ -0,0 +1,89 @@
+import argparse
+
+import pandas as pd
+
+from intake_engine import RESULT_COLUMNS, compute_intake_targets, format_intake_results
+from result_export import EXPORT_FORMATS, ResultWriter
+from row_validation import validate_user_data
+from target_cache import TargetCache
+
+# Streaming version of the roster upload path in test2.main.
+# The roster is read, cleaned and computed one chunk at a time and each chunk's
+# results are appended to the output file (CSV or Parquet, see result_export),
+# so peak memory depends on the chunk size rather than on the size of the roster.
+
+DEFAULT_CHUNKSIZE = 100_000
+NUMERIC_COLUMNS = ["age", "weight", "height"]
+# Read as text in every chunk: a chunk whose names are all numbers or all blank
+# would otherwise get a numeric column ("007" -> 7) that the full read doesn't
+TEXT_COLUMNS = {"name": "string", "gender": "string"}
+
+# Function to rewind an uploaded file or open path before another pass
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+# Function to map the file's header names by their cleaned form ("Age " -> "age")
+def _raw_columns(source):
+    columns = pd.read_csv(_rewind(source), nrows=0).columns
+    return {str(column).strip().lower(): column for column in columns}
+
+# Function to find which numeric columns a full pd.read_csv would leave as floats
+# A single blank or non-numeric value turns the whole column into float64, which
+# changes how every row is written ("43.0" instead of "43"), so this cheap first
+# pass keeps chunked output identical to the in-memory path.
+def scan_float_columns(source, chunksize=DEFAULT_CHUNKSIZE):
+    float_columns = set()
+    raw_columns = _raw_columns(source)
+    usecols = [raw_columns[column] for column in NUMERIC_COLUMNS if column in raw_columns]
+    reader = pd.read_csv(_rewind(source), usecols=usecols, chunksize=chunksize)
+    for chunk in reader:
+        for column in chunk.columns:
+            if not pd.api.types.is_integer_dtype(pd.to_numeric(chunk[column], errors="coerce")):
+                float_columns.add(str(column).strip().lower())
+    return float_columns
+
+# Function to stream a user roster CSV into a results file chunk by chunk
+# Returns the number of rows written and the number of rows rejected
+# With a TargetCache, each chunk only computes profiles not seen in earlier chunks.
+def stream_user_results(source, output_file, chunksize=DEFAULT_CHUNKSIZE, fmt="csv", compression=None, target_cache=None):
+    float_columns = scan_float_columns(source, chunksize)
+    raw_columns = _raw_columns(source)
+    text_dtypes = {raw_columns[column]: dtype for column, dtype in TEXT_COLUMNS.items() if column in raw_columns}
+    rows_rejected = 0
+    with ResultWriter(output_file, fmt, compression) as writer:
+        for chunk in pd.read_csv(_rewind(source), chunksize=chunksize, dtype=text_dtypes):
+            user_data, rejections = validate_user_data(chunk)
+            for column in float_columns:
+                user_data[column] = user_data[column].astype("float64")
+            if target_cache is not None:
+                targets = target_cache.targets_frame(user_data)
+            else:
+                targets = compute_intake_targets(user_data)
+            writer.write(format_intake_results(user_data, targets))
+            rows_rejected += rejections["row"].nunique() + int((~targets["valid"]).sum())
+        if writer.rows == 0:
+            writer.write(pd.DataFrame(columns=RESULT_COLUMNS))
+    return writer.rows, rows_rejected
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a user roster CSV into an intake results CSV.")
+    parser.add_argument("input", help="user roster CSV (name, gender, age, weight, height)")
+    parser.add_argument("output", help="results file to write")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="output format")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], help="compress the output")
+    parser.add_argument("--memoize", action="store_true", help="compute each distinct (gender, age, weight, height) profile once")
+    args = parser.parse_args()
+    target_cache = TargetCache() if args.memoize else None
+    rows_written, rows_rejected = stream_user_results(
+        args.input, args.output, args.chunksize, args.format, args.compression, target_cache
+    )
+    print(f"Wrote {rows_written} rows to {args.output} ({rows_rejected} rejected)")
+    if target_cache is not None:
+        stats = target_cache.stats()
+        print(f"Target cache: {stats['hits']} hits, {stats['misses']} misses, {stats['uncached']} uncached rows, {stats['hit_rate']:.1%} hit rate")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from food_parser import NUTRIENT_UNITS, REQUIRED_COLUMNS, UNIT_FACTORS, parse_nutrient_columns
+from nutrition_core import FEMALE_GENDERS, MALE_GENDERS
+
+# Declarative validation for the user and food tables.
+# A schema maps each column to its rules:
+#   type          "text", "number" or "nutrient" (a number with a unit, parsed
+#                 by food_parser; the unit must be one the column can use)
+#   lower         lower-case text before checking it
+#   allowed       the only values text may take
+#   greater_than  / min: exclusive / inclusive lower bound of a number
+#   default       value for a missing cell; without one a missing cell is rejected
+# Headers are stripped and lower-cased (in a copy; headers that then clash, like
+# "Age" and "age", are an error) before the columns are checked, then every
+# rule is evaluated as one vectorized mask over its column: no per-row Python and
+# no exceptions for bad rows. The result is the clean frame (rows that broke no
+# rule) plus a compact rejection table with one (row, column, reason) line per
+# broken rule, where row is the input frame's index label.
+
+USER_SCHEMA = {
+    "name": {"type": "text"},
+    "gender": {"type": "text", "lower": True, "allowed": MALE_GENDERS + FEMALE_GENDERS},
+    "age": {"type": "number", "greater_than": 0},
+    "weight": {"type": "number", "greater_than": 0},
+    "height": {"type": "number", "greater_than": 0},
+}
+
+# Function to build the food schema for a set of nutrient columns
+# Missing nutrients count as 0, as they always have; unparseable ones are rejected.
+def food_schema(columns=REQUIRED_COLUMNS):
+    return {column: {"type": "nutrient", "min": 0, "default": 0} for column in columns}
+
+FOOD_SCHEMA = food_schema()
+
+# Function to flag empty cells (missing, or only whitespace)
+def _blank(series):
+    blank = series.isna().to_numpy()
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        blank = blank | series.astype(str).str.strip().eq("").to_numpy()
+    return blank
+
+# Function to check text columns; returns the cleaned values and (reason, mask) pairs
+def _check_text(series, rules):
+    values = series.astype(str).str.strip()
+    if rules.get("lower"):
+        values = values.str.lower()
+    values = values.where(series.notna())
+    problems = []
+    if "allowed" in rules:
+        bad = ~values.isin(rules["allowed"]).to_numpy()
+        problems.append((f"must be one of: {', '.join(rules['allowed'])}", bad))
+    return values, problems
+
+# Function to check numbers against their bounds
+def _check_range(values, rules):
+    problems = []
+    with np.errstate(invalid="ignore"):
+        if "greater_than" in rules:
+            problems.append((f"must be > {rules['greater_than']}", values <= rules["greater_than"]))
+        if "min" in rules:
+            problems.append((f"must be >= {rules['min']}", values < rules["min"]))
+    return problems
+
+# Function to check plain numeric columns
+def _check_number(series, rules):
+    values = pd.to_numeric(series, errors="coerce")
+    numbers = values.to_numpy(dtype=np.float64)
+    return values, [("not a number", np.isnan(numbers))] + _check_range(numbers, rules)
+
+# Function to describe the units a nutrient column accepts
+def _unit_reason(column):
+    units = [unit for unit in UNIT_FACTORS[NUTRIENT_UNITS[column]] if unit]
+    return f"not a number with a unit ({', '.join(units)})"
+
+# Function to validate a frame against a schema
+# Returns (clean frame, rejection table); raises ValueError only for missing or duplicate columns.
+# The caller's frame is left as it is.
+def validate_frame(frame, schema):
+    columns = frame.columns.astype(str).str.strip().str.lower()
+    duplicates = sorted(set(columns[columns.duplicated()]))
+    if duplicates:
+        raise ValueError(f"Duplicate columns once headers are normalized: {', '.join(duplicates)}")
+    frame = frame.set_axis(columns, axis=1)
+    for column in schema:
+        if column not in frame.columns:
+            raise ValueError(f"Missing required column: {column}")
+    # (column, reason, mask) for every rule, blanks first
+    checks = []
+    blanks = {column: _blank(frame[column]) for column in schema}
+    # Nutrients are parsed together, in food_parser's single pass
+    nutrients = [column for column, rules in schema.items() if rules["type"] == "nutrient"]
+    if nutrients:
+        frame = parse_nutrient_columns(frame, nutrients)
+    for column, rules in schema.items():
+        blank = blanks[column]
+        if rules["type"] == "text":
+            frame[column], problems = _check_text(frame[column], rules)
+        elif rules["type"] == "number":
+            frame[column], problems = _check_number(frame[column], rules)
+        else:
+            numbers = frame[column].to_numpy(dtype=np.float64)
+            problems = [(_unit_reason(column), np.isnan(numbers))] + _check_range(numbers, rules)
+        if "default" in rules:
+            frame[column] = frame[column].where(~blank, rules["default"])
+        else:
+            checks.append((column, "missing", blank))
+        # A blank cell only reports "missing" (or takes its default), nothing else
+        checks += [(column, reason, mask & ~blank) for reason, mask in problems]
+
+    masks = np.array([mask for _, _, mask in checks]).reshape(len(checks), len(frame))
+    rule_index, positions = np.nonzero(masks)
+    # Order the table by row, then by the schema's column order
+    order = np.lexsort((rule_index, positions))
+    rule_index, positions = rule_index[order], positions[order]
+    columns = [column for column, _, _ in checks]
+    reasons = [reason for _, reason, _ in checks]
+    column_names = list(dict.fromkeys(columns))
+    reason_names = list(dict.fromkeys(reasons))
+    rejections = pd.DataFrame({
+        "row": frame.index.to_numpy()[positions],
+        "column": pd.Categorical.from_codes(np.array([column_names.index(c) for c in columns], dtype=np.int64)[rule_index], column_names),
+        "reason": pd.Categorical.from_codes(np.array([reason_names.index(r) for r in reasons], dtype=np.int64)[rule_index], reason_names),
+    })
+    return frame[~masks.any(axis=0)], rejections
+
+# Function to validate one record (a dict) against the text and number rules of a schema
+# Returns (column, reason) pairs worded as in validate_frame's rejection table,
+# for callers that check one request at a time (see intake_service).
+def validate_record(record, schema):
+    problems = []
+    for column, rules in schema.items():
+        value = record.get(column)
+        if value is None or (isinstance(value, float) and math.isnan(value)) or str(value).strip() == "":
+            if "default" not in rules:
+                problems.append((column, "missing"))
+            continue
+        if rules["type"] == "text":
+            value = str(value).strip()
+            if rules.get("lower"):
+                value = value.lower()
+            if "allowed" in rules and value not in rules["allowed"]:
+                problems.append((column, f"must be one of: {', '.join(rules['allowed'])}"))
+        elif rules["type"] == "number":
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                problems.append((column, "not a number"))
+                continue
+            if "greater_than" in rules and not number > rules["greater_than"]:
+                problems.append((column, f"must be > {rules['greater_than']}"))
+            if "min" in rules and not number >= rules["min"]:
+                problems.append((column, f"must be >= {rules['min']}"))
+        else:
+            raise ValueError(f"validate_record can't check {rules['type']} columns")
+    return problems
+
+# Function to validate a user roster (name, gender, age, weight, height)
+def validate_user_data(user_data):
+    return validate_frame(user_data, USER_SCHEMA)
+
+# Function to validate a food content table's nutrient columns
+def validate_food_data(food_data, columns=REQUIRED_COLUMNS):
+    return validate_frame(food_data, FOOD_SCHEMA if columns == REQUIRED_COLUMNS else food_schema(columns))
+
+# Function to summarize a rejection table as "N row(s): reason counts"
+def rejection_summary(rejections):
+    counts = rejections.groupby(["column", "reason"], observed=True).size()
+    details = ", ".join(f"{column} {reason} ({count})" for (column, reason), count in counts.items())
+    return f"{rejections['row'].nunique()} row(s) rejected: {details}"
@@ -0,0 +1,189 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from intake_engine import compute_intake_targets
+from nutrition_core import calculate_daily_intake
+
+# Memoized daily intake targets keyed by (gender, age, weight, height).
+# Numbers are keyed at a fixed precision (by default 1 decimal of a year and 2
+# decimals of kg / cm, as the Streamlit number inputs show), and the full target
+# tuple is cached per profile with LRU eviction. Only profiles that are exact at
+# that precision are cached, so a cached result is always the one intake_engine
+# gives for the real profile; finer values (e.g. age 50.45) are computed as they are.
+# float32 columns (see compact_frames) count as exact when the key value narrows
+# to the same float32, so a compact 70.1 is served the targets of 70.1. A roster is
+# factorized into its distinct profiles first, so only profiles not already in
+# the cache are computed (in one vectorized intake_engine call): the work grows
+# with the number of distinct profiles, not rows. A profile key is packed into one
+# int (gender id, age, weight, height in 7/12/22/22 bits); profiles that don't
+# fit, e.g. a missing, negative or too precise number, are computed directly and
+# not cached; stats() counts them as "uncached" rows, apart from hits and misses.
+# One cache is shared by every session (st.cache_resource): lookups, the LRU order,
+# the gender ids and the counters are only touched under a lock, while the
+# targets themselves are computed outside it.
+
+DEFAULT_MAX_ENTRIES = 100_000
+TARGET_KEYS = ["bmr", "bmi", "sodium_intake", "fat_intake", "protein_min", "protein_max", "carb_intake", "sugar_intake"]
+# compute_intake_targets gives these as whole numbers; keep them that way
+INTEGER_TARGETS = ["sodium_intake", "sugar_intake"]
+GENDER_BITS, AGE_BITS, WEIGHT_BITS, HEIGHT_BITS = 7, 12, 22, 22
+
+class TargetCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, age_decimals=1, weight_decimals=2, height_decimals=2):
+        self.max_entries = max_entries
+        self.scales = {
+            "age": 10 ** age_decimals,
+            "weight": 10 ** weight_decimals,
+            "height": 10 ** height_decimals,
+        }
+        self.genders = {}
+        self.gender_names = []
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rows = 0
+        self.uncached = 0
+        self.lock = threading.Lock()
+
+    # Stable small id for a (lower-cased) gender string, or -1 once ids run out
+    def _gender_id(self, gender):
+        if gender not in self.genders and len(self.gender_names) < 2 ** GENDER_BITS:
+            self.genders[gender] = len(self.gender_names)
+            self.gender_names.append(gender)
+        return self.genders.get(gender, -1)
+
+    # Function to scale numbers to key integers; also returns which are exact at that precision
+    # (at float32 precision for float32 values)
+    def _quantize(self, values, scale):
+        values = np.asarray(values)
+        dtype = np.float32 if values.dtype == np.float32 else np.float64
+        values = values.astype("float64")
+        quantized = np.round(values * scale)
+        with np.errstate(invalid="ignore", over="ignore"):
+            return quantized, (quantized / scale).astype(dtype) == values.astype(dtype)
+
+    # Function to pack quantized profiles into int keys; also returns which fit
+    def _pack(self, gender_ids, age, weight, height, exact):
+        fits = (gender_ids >= 0) & exact
+        for values, bits in ((age, AGE_BITS), (weight, WEIGHT_BITS), (height, HEIGHT_BITS)):
+            with np.errstate(invalid="ignore"):
+                fits &= (values >= 0) & (values < 2 ** bits)
+        age, weight, height = (np.where(fits, values, 0).astype(np.int64) for values in (age, weight, height))
+        keys = (np.where(fits, gender_ids, 0).astype(np.int64) << (AGE_BITS + WEIGHT_BITS + HEIGHT_BITS)) | (age << (WEIGHT_BITS + HEIGHT_BITS)) | (weight << HEIGHT_BITS) | height
+        return keys, fits
+
+    # Function to turn packed keys back into a profile frame for intake_engine
+    def _unpack(self, keys):
+        return pd.DataFrame({
+            "gender": np.array(self.gender_names, dtype=object)[keys >> (AGE_BITS + WEIGHT_BITS + HEIGHT_BITS)],
+            "age": ((keys >> (WEIGHT_BITS + HEIGHT_BITS)) & (2 ** AGE_BITS - 1)) / self.scales["age"],
+            "weight": ((keys >> HEIGHT_BITS) & (2 ** WEIGHT_BITS - 1)) / self.scales["weight"],
+            "height": (keys & (2 ** HEIGHT_BITS - 1)) / self.scales["height"],
+        })
+
+    def _store(self, keys, values):
+        # Only the newest max_entries could survive eviction anyway
+        keys = np.asarray(keys, dtype=np.int64)[-self.max_entries:].tolist()
+        values = np.asarray(values, dtype="float64")[-self.max_entries:].tolist()
+        self.entries.update(zip(keys, map(tuple, values)))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    # Targets for one person, as nutrition_core.calculate_daily_intake returns them
+    # Invalid genders raise ValueError there and are not cached.
+    def get(self, gender, age, weight, height):
+        gender = str(gender).lower()
+        quantized, exact = zip(*(self._quantize([value], scale) for value, scale in zip((age, weight, height), self.scales.values())))
+        with self.lock:
+            self.rows += 1
+            keys, fits = self._pack(np.array([self._gender_id(gender)]), *quantized, exact[0] & exact[1] & exact[2])
+            key = int(keys[0])
+            values = self.entries.get(key) if fits[0] else None
+            # Profiles cached as invalid by a roster run fall through so the error is raised
+            hit = values is not None and values[-1]
+            if hit:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            elif fits[0]:
+                self.misses += 1
+            else:
+                self.uncached += 1
+        if hit:
+            targets = dict(zip(TARGET_KEYS, values))
+            targets.update({name: int(targets[name]) for name in INTEGER_TARGETS})
+            return targets
+        targets = calculate_daily_intake(gender, age, weight, height)
+        if fits[0]:
+            with self.lock:
+                self._store([key], [[targets[name] for name in TARGET_KEYS] + [True]])
+        return targets
+
+    # Targets for a whole roster, in the same layout as compute_intake_targets
+    def targets_frame(self, user_data):
+        gender_codes, gender_values = pd.factorize(user_data["gender"].astype(str).str.lower())
+        quantized, exact = zip(*(
+            self._quantize(user_data[column].to_numpy(dtype=np.float32 if user_data[column].dtype == np.float32 else "float64"), scale)
+            for column, scale in self.scales.items()
+        ))
+        with self.lock:
+            self.rows += len(user_data)
+            gender_ids = np.array([self._gender_id(gender) for gender in gender_values] + [-1])[gender_codes]
+            keys, fits = self._pack(gender_ids, *quantized, exact[0] & exact[1] & exact[2])
+            codes, profile_keys = pd.factorize(keys[fits])
+            profile_keys = profile_keys.tolist()
+
+            found = [self.entries.get(key) for key in profile_keys]
+            hit = np.fromiter((values is not None for values in found), dtype=bool, count=len(found))
+            values = np.empty((len(profile_keys), len(TARGET_KEYS) + 1))
+            hit_positions = np.flatnonzero(hit)
+            if len(hit_positions):
+                values[hit_positions] = [found[i] for i in hit_positions]
+                for i in hit_positions:
+                    self.entries.move_to_end(profile_keys[i])
+            missing = np.flatnonzero(~hit)
+            missing_keys = np.asarray(profile_keys, dtype=np.int64)[missing]
+            missing_profiles = self._unpack(missing_keys)
+            self.hits += len(hit_positions)
+            self.misses += len(missing)
+            self.uncached += int((~fits).sum())
+        if len(missing):
+            computed = compute_intake_targets(missing_profiles)
+            values[missing] = computed[TARGET_KEYS + ["valid"]].to_numpy(dtype="float64")
+            with self.lock:
+                self._store(missing_keys, values[missing])
+
+        targets = np.empty((len(user_data), len(TARGET_KEYS) + 1))
+        targets[fits] = values[codes]
+        if not fits.all():
+            # Profiles that can't be packed (missing numbers, ...) are computed as they are
+            targets[~fits] = compute_intake_targets(user_data[~fits])[TARGET_KEYS + ["valid"]].to_numpy(dtype="float64")
+        targets = pd.DataFrame(targets, columns=TARGET_KEYS + ["valid"], index=user_data.index)
+        targets = targets.astype({column: "int64" for column in INTEGER_TARGETS})
+        targets["valid"] = targets["valid"].astype(bool)
+        return targets
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return self._stats()
+
+    def _stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "rows": self.rows,
+            "uncached": self.uncached,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,35 +1,13 @@
-import pandas as pd
 import streamlit as st
+from csv_backends import read_csv_files
+from food_parser import parse_nutrient_columns
+from nutrition_core import calculate_bmi, calculate_bmr, calculate_percentage, suggest_daily_sugar
 
-# Function to calculate BMR
-def calculate_bmr(gender, age, weight, height):
-    gender = gender.lower()
-    if gender in ["male", "m"]:
-        bmr = 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-    elif gender in ["female", "f"]:
-        bmr = 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
-    else:
-        raise ValueError("Invalid gender. Please enter 'male' or 'female'.")
-    return bmr
-# Function to suggest daily sugar intake
-def suggest_daily_sugar():
-    return 25  # Recommended daily sugar intake in grams
-
-# Function to calculate BMI
-def calculate_bmi(weight, height):
-    height_m = height / 100
-    bmi = weight / (height_m ** 2)
-    return bmi
-# Function to calculate percentage
-def calculate_percentage(amount, daily_intake):
-    return (amount / daily_intake) * 100
-
-
-# Function to process the uploaded food file
-def process_food_file(uploaded_file):
+# Function to process the uploaded food files
+def process_food_file(uploaded_files):
     try:
-        # Read the CSV file into a DataFrame
-        food_data = pd.read_csv(uploaded_file)
+        # Read the CSV files into one DataFrame (in parallel, backend picked by file size)
+        food_data, _ = read_csv_files(uploaded_files)
 
         # Normalize column names
         food_data.columns = food_data.columns.str.strip().str.lower().str.replace(r"\(.*\)", "", regex=True)
@@ -40,11 +18,8 @@ def process_food_file(uploaded_file):
             if column not in food_data.columns:
                 raise ValueError(f"Missing required column: {column}")
 
-        # Clean numeric columns by removing non-numeric characters
-        for column in required_columns:
-            food_data[column] = pd.to_numeric(
-                food_data[column].str.replace("[^0-9.]", "", regex=True), errors="coerce"
-            )
+        # Parse numeric columns and convert them to canonical units (e.g. "0.036g" sodium -> 36 mg)
+        food_data = parse_nutrient_columns(food_data, required_columns)
 
         # Fill missing values with 0
         food_data.fillna(0, inplace=True)
@@ -63,7 +38,7 @@ def main():
     age = st.number_input("Enter your age (in years):", min_value=1, value=25)
     weight = st.number_input("Enter your weight (in kg):", min_value=1.0, value=70.0)
     height = st.number_input("Enter your height (in cm):", min_value=1.0, value=170.0)
-    uploaded_file = st.file_uploader("Upload Food Content CSV:", type=["csv"])
+    uploaded_files = st.file_uploader("Upload Food Content CSV:", type=["csv"], accept_multiple_files=True)
 
     if st.button("Calculate"):
         try:
@@ -104,8 +79,8 @@ def main():
             st.write(f"**Carbohydrate Intake (g):** {carb_intake:.2f}" if carb_intake is not None else "Carbohydrate Intake: N/A")
             st.write(f"**Sugar Intake (mg):** {sugar_intake}")
             # Process the uploaded file
-            if uploaded_file is not None:
-                food_data = process_food_file(uploaded_file)
+            if uploaded_files:
+                food_data = process_food_file(uploaded_files)
 
                 if food_data is not None:
                     # Calculate total intake
@@ -1,75 +1,230 @@
+import os
+from functools import partial, update_wrapper
+
 import pandas as pd
 import streamlit as st
+import food_parser
+import intake_engine
+import perf_probe
+from compact_frames import compact_food_data, compact_user_data
+from csv_backends import BACKENDS, format_reports, read_csv_files
+from food_log import DEFAULT_LOG_DIR, WINDOWS, FoodLog
+from food_search import FoodSearch
+from intake_engine import format_intake_results
+from meal_matrix import NUTRIENTS, meal_totals, percentage_tensor, target_matrix
+from meal_model import NUTRIENT_COLUMNS, Meal
+from meal_plan import MAX_PLAN_FOODS, plan_meals
+from nutrition_core import calculate_percentage
+from parse_cache import ParseCache, cached_parse
+from result_export import EXPORT_FORMATS, available_compressions, export_file_name, export_mime, export_results, read_export
+from result_viewer import DEFAULT_PAGE_SIZE, PAGE_SIZES, ResultView
+from row_validation import rejection_summary, validate_food_data, validate_user_data
+from target_cache import TargetCache
 
-# Function to calculate BMR
-def calculate_bmr(gender, age, weight, height):
-    gender = gender.lower()
-    if gender in ["male", "m"]:
-        bmr = 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-    elif gender in ["female", "f"]:
-        bmr = 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
-    else:
-        raise ValueError("Invalid gender. Please enter 'male' or 'female'.")
-    return bmr
-
-# Function to suggest daily sugar intake
-def suggest_daily_sugar():
-    return 25
-
-# Function to calculate BMI
-def calculate_bmi(weight, height):
-    height_m = height / 100
-    bmi = weight / (height_m ** 2)
-    return bmi
-
-# Function to process user data from a CSV file
-def process_user_data_file(uploaded_user_file):
+# Function to process user data from one or more CSV files (read concurrently)
+# Returns (clean user data, rejected rows), see row_validation; the per-file
+# CSV parse report is kept in user_data.attrs["csv_report"].
+def process_user_data_file(uploaded_user_files, backend="auto"):
     try:
-        user_data = pd.read_csv(uploaded_user_file)
-        required_columns = ["name", "gender", "age", "weight", "height"]
-        for column in required_columns:
-            if column not in user_data.columns:
-                raise ValueError(f"Missing required column: {column}")
-        user_data.columns = user_data.columns.str.strip().str.lower()
-        user_data["name"] = user_data["name"].str.strip()
-        user_data["gender"] = user_data["gender"].str.lower().str.strip()
-        user_data["age"] = pd.to_numeric(user_data["age"], errors="coerce")
-        user_data["weight"] = pd.to_numeric(user_data["weight"], errors="coerce")
-        user_data["height"] = pd.to_numeric(user_data["height"], errors="coerce")
-        user_data.dropna(subset=["name", "gender", "age", "weight", "height"], inplace=True)
-        return user_data
+        with perf_probe.stage("user read_csv"):
+            user_data, reports = read_csv_files(uploaded_user_files, backend)
+        with perf_probe.stage("user clean"):
+            user_data, rejections = validate_user_data(user_data)
+        user_data.attrs["csv_report"] = reports
+        return user_data, rejections
     except Exception as e:
         st.error(f"Error processing user data file: {e}")
         return None
 
-# Function to calculate percentage
-def calculate_percentage(amount, daily_intake):
-    if daily_intake > 0:
-        return (amount / daily_intake) * 100
-    return 0
-
-# Function to process food content data from a CSV file
-def process_food_file(uploaded_food_file):
+# Function to process food content data from one or more CSV files (read concurrently)
+# Returns (clean food data, rejected rows), see row_validation
+def process_food_file(uploaded_food_files, backend="auto"):
     try:
-        food_data = pd.read_csv(uploaded_food_file)
-        required_columns = ["sodium", "calories", "carbohydrates", "fat", "protein", "sugar"]
-        for column in required_columns:
-            if column not in food_data.columns:
-                raise ValueError(f"Missing required column: {column}")
-        food_data.columns = food_data.columns.str.strip().str.lower()
-        for column in required_columns:
-            food_data[column] = pd.to_numeric(
-                food_data[column].astype(str).str.replace(r"[^\d.]", "", regex=True), errors="coerce"
-            )
-        food_data.fillna(0, inplace=True)
-        return food_data
+        with perf_probe.stage("food read_csv"):
+            food_data, reports = read_csv_files(uploaded_food_files, backend)
+        with perf_probe.stage("food parse"):
+            food_data, rejections = validate_food_data(food_data)
+        food_data.attrs["csv_report"] = reports
+        return food_data, rejections
     except Exception as e:
         st.error(f"Error processing food content file: {e}")
         return None
 
+# Function to bind a CSV backend to a parse function
+# The backend is part of its name, and so of the parse cache key: each backend
+# parses (and reports on) an upload itself.
+def with_backend(parse_fn, backend):
+    bound = update_wrapper(partial(parse_fn, backend=backend), parse_fn)
+    bound.__name__ = f"{parse_fn.__name__}[{backend}]"
+    return bound
+
+
+# Function to process user data into compact dtypes (float32 numbers, less memory)
+def process_user_data_file_compact(uploaded_user_files, backend="auto"):
+    parsed = process_user_data_file(uploaded_user_files, backend)
+    if parsed is not None:
+        user_data, rejections = parsed
+        with perf_probe.stage("user compact"):
+            parsed = (compact_user_data(user_data), rejections)
+    return parsed
+
+# Function to process food content data into compact dtypes
+def process_food_file_compact(uploaded_food_files, backend="auto"):
+    parsed = process_food_file(uploaded_food_files, backend)
+    if parsed is not None:
+        food_data, rejections = parsed
+        with perf_probe.stage("food compact"):
+            parsed = (compact_food_data(food_data), rejections)
+    return parsed
+
+# Function to validate the manual input as a one-row roster
+# Returns (profile frame, list of "column reason" problems)
+def validate_manual_input(name, gender, age, weight, height):
+    profile, rejections = validate_user_data(pd.DataFrame([{"name": name, "gender": gender, "age": age, "weight": weight, "height": height}]))
+    return profile, [f"{column} {reason}" for column, reason in zip(rejections["column"], rejections["reason"])]
+
+# Function to pick the foods the portion planner works from, warning when the catalog is cut
+def plan_food_subset(food_data, plan_foods):
+    if len(food_data) > plan_foods:
+        st.warning(f"Suggested portions use the first {plan_foods} of {len(food_data)} foods.")
+    return food_data.head(plan_foods)
+
+# Function to show which CSV backend parsed each uploaded file, and how fast
+def show_csv_report(frame):
+    reports = frame.attrs.get("csv_report")
+    if reports:
+        st.caption("CSV parsing: " + "; ".join(format_reports(reports)))
+
+# Function to show how much memory compact mode saved on a frame
+def show_compact_report(label, frame):
+    report = frame.attrs.get("compact_report")
+    if report:
+        before_kb, after_kb = report["before_bytes"] / 1024, report["after_bytes"] / 1024
+        st.caption(
+            f"Compact mode: {label} uses {after_kb:,.0f} KB instead of {before_kb:,.0f} KB "
+            f"({1 - after_kb / before_kb:.0%} less)"
+        )
+
+# Function to get the parse cache shared across reruns
+@st.cache_resource
+def get_parse_cache():
+    return ParseCache()
+
+# Function to get the intake target cache shared across reruns and sessions
+@st.cache_resource
+def get_target_cache():
+    return TargetCache()
+
+# Function to build a meal interactively from the uploaded food catalog
+# The catalog is parsed and indexed for search once per upload and kept in the
+# session; every add, edit or remove only updates the meal's running totals.
+def meal_builder(uploaded_food_files, parse_cache, targets, parse_food=process_food_file):
+    st.subheader("Meal Builder")
+    state = st.session_state
+    catalog_id = (tuple(uploaded_file.file_id for uploaded_file in uploaded_food_files), parse_food.__name__)
+    if state.get("meal_catalog_id") != catalog_id:
+        parsed_food = cached_parse(parse_cache, uploaded_food_files, parse_food, food_parser.PARSER_VERSION)
+        if parsed_food is None:
+            return
+        food_data = parsed_food[0]
+        if "content" not in food_data.columns:
+            st.info("Add a Content column with food names to the food file to build meals from it.")
+            return
+        state["meal_catalog_id"] = catalog_id
+        state["meal_catalog"] = food_data
+        with perf_probe.stage("food search index"):
+            state["meal_search"] = FoodSearch.build(food_data["content"].astype(object).fillna("").to_numpy())
+        state["meal"] = Meal()
+    food_data = state["meal_catalog"]
+    meal = state["meal"]
+
+    query = st.text_input("Search foods:", key="meal_food_query")
+    matches = state["meal_search"].search(query) if query.strip() else []
+    row = st.selectbox("Food:", matches, format_func=lambda row: food_data["content"].iat[row])
+    portions = st.number_input("Portions:", min_value=0.0, value=1.0, step=0.5, key="meal_portions")
+    if st.button("Add to Meal"):
+        if row is None:
+            st.error(f"No food matching '{query}' in the uploaded file.")
+        else:
+            meal.add_item(food_data["content"].iat[row], food_data[NUTRIENT_COLUMNS].iloc[row].to_dict(), portions)
+
+    for item_id, item in list(meal.items.items()):
+        name_column, portions_column, remove_column = st.columns([4, 2, 1])
+        name_column.write(item["name"])
+        new_portions = portions_column.number_input(
+            "Portions", min_value=0.0, value=float(item["quantity"]), step=0.5,
+            key=f"meal_portions_{item_id}", label_visibility="collapsed",
+        )
+        if new_portions != item["quantity"]:
+            meal.edit_item(item_id, quantity=new_portions)
+        if remove_column.button("Remove", key=f"meal_remove_{item_id}"):
+            meal.remove_item(item_id)
+            st.rerun()
+
+    if len(meal):
+        totals = meal.totals()
+        st.write(f"**Meal Sodium (mg):** {totals['sodium']:.2f}")
+        st.write(f"**Meal Calories (kcal):** {totals['calories']:.2f}")
+        st.write(f"**Meal Carbohydrates (g):** {totals['carbohydrates']:.2f}")
+        st.write(f"**Meal Fat (g):** {totals['fat']:.2f}")
+        st.write(f"**Meal Protein (g):** {totals['protein']:.2f}")
+        st.write(f"**Meal Sugar (g):** {totals['sugar']:.2f}")
+        if targets is not None:
+            for nutrient, percentage in meal.percentages(targets).items():
+                st.write(f"**{nutrient}:** {percentage:.2f}%")
+
+# Function to log the built meal for the manual-input user and show their rollups
+# profile is the validated manual input as a dict (name, gender, age, weight, height).
+def food_log_panel(meal, profile):
+    st.subheader("Food Log")
+    log_date = st.date_input("Meal date:", key="food_log_date")
+    log = FoodLog(DEFAULT_LOG_DIR)
+    try:
+        if st.button("Log Meal", disabled=not len(meal)):
+            log.set_profile(profile["name"], profile["gender"], profile["age"], profile["weight"], profile["height"])
+            log.append_entries([
+                {"user": profile["name"], "date": log_date, "food": item["name"], "nutrients": dict(zip(meal.nutrients, item["values"])), "portions": item["quantity"]}
+                for item in meal.items.values()
+            ])
+            st.success(f"Logged {len(meal)} food(s) for {profile['name']} on {log_date.isoformat()}")
+        # Rolling averages straight from the precomputed rollups
+        for window in WINDOWS:
+            rollup = log.dashboard(log_date, window, profile["name"])
+            if len(rollup):
+                st.write(f"**Last {window} days**")
+                st.dataframe(rollup.drop(columns=["Name"]), hide_index=True)
+    finally:
+        log.close()
+
+# Function to show a large table one page at a time
+# Only the current page is sent to the browser; sorting and filtering run on the
+# server against the view's precomputed sort orders.
+def paged_table(title, view, key):
+    st.subheader(title)
+    summary = view.summary()
+    if not summary.empty:
+        st.caption(f"Summary of {len(view)} rows")
+        st.dataframe(summary.round(2))
+    sort_column, order_column, size_column = st.columns([3, 2, 2])
+    sort_by = sort_column.selectbox("Sort by:", ["(row order)"] + list(view.frame.columns), key=f"{key}_sort")
+    order = order_column.selectbox("Order:", ["Ascending", "Descending"], key=f"{key}_order")
+    page_size = size_column.selectbox("Rows per page:", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key=f"{key}_size")
+    filters = {"sort_by": None if sort_by == "(row order)" else sort_by, "descending": order == "Descending"}
+    if view.text_column is not None:
+        filters["query"] = st.text_input(f"Filter {view.text_column}:", key=f"{key}_query")
+    if filters["sort_by"] in view.numeric_columns:
+        low_column, high_column = st.columns(2)
+        filters["low"] = low_column.number_input(f"Min {sort_by}:", value=None, key=f"{key}_low")
+        filters["high"] = high_column.number_input(f"Max {sort_by}:", value=None, key=f"{key}_high")
+    page_number = st.number_input("Page:", min_value=1, value=1, step=1, key=f"{key}_page")
+    page, matches, pages = view.page(page_number, page_size, **filters)
+    st.dataframe(page)
+    st.caption(f"Page {min(page_number, pages)} of {pages} ({matches} matching rows)")
+
 # Streamlit App
 def main():
     st.title("Daily Suggested Intake Calculator")
+    perf_probe.start_run()
 
     # Let the user choose between manual input and CSV upload
     input_method = st.radio("Choose Input Method:", ("Manual Input", "Upload User Data CSV"))
@@ -82,74 +237,109 @@ def main():
         age = st.number_input("Enter your age (in years):", min_value=1, value=25, step=1)
         weight = st.number_input("Enter your weight (in kg):", min_value=1.0, value=70.0, step=0.1)
         height = st.number_input("Enter your height (in cm):", min_value=1.0, value=170.0, step=0.1)
-        uploaded_user_file = None  # Disable CSV upload
+        uploaded_user_files = None  # Disable CSV upload
 
     # CSV Upload
     elif input_method == "Upload User Data CSV":
         st.subheader("Upload User Data CSV")
-        uploaded_user_file = st.file_uploader("Upload User Data CSV (name, gender, age, weight, height):", type=["csv"])
+        # Several files are parsed concurrently and combined into one roster
+        uploaded_user_files = st.file_uploader(
+            "Upload User Data CSV (name, gender, age, weight, height):", type=["csv"], accept_multiple_files=True
+        ) or None
+        export_format = st.selectbox("Results export format:", EXPORT_FORMATS)
+        export_compression = st.selectbox("Results export compression:", [compression or "none" for compression in available_compressions()])
         name = gender = age = weight = height = None  # Disable manual input
 
     # File uploader for food content CSV
     st.subheader("Upload Food Content CSV")
-    uploaded_food_file = st.file_uploader("Upload Food Content CSV (sodium, calories, carbohydrates, fat, protein, sugar):", type=["csv"])
+    uploaded_food_files = st.file_uploader(
+        "Upload Food Content CSV (sodium, calories, carbohydrates, fat, protein, sugar):", type=["csv"], accept_multiple_files=True
+    ) or None
+
+    parse_cache = get_parse_cache()
+    target_cache = get_target_cache()
+    compact_mode = st.checkbox("Compact memory mode (smaller dtypes, float32 numbers)")
+    csv_backend = st.selectbox("CSV parser:", BACKENDS, help="auto: pyarrow (multi-threaded) for large files, pandas otherwise")
+
+    # Portion planning costs O(foods^3), so it is opt-in and works from a capped subset
+    plan_portions = st.checkbox("Suggest meal portions (slow on large catalogs)")
+    plan_foods = st.number_input(
+        "Plan portions from the first N foods:", min_value=1, max_value=MAX_PLAN_FOODS, value=min(100, MAX_PLAN_FOODS), step=1, disabled=not plan_portions
+    )
+    parse_user = with_backend(process_user_data_file_compact if compact_mode else process_user_data_file, csv_backend)
+    parse_food = with_backend(process_food_file_compact if compact_mode else process_food_file, csv_backend)
+    # Large tables are kept on the server and paged below, across reruns
+    view_source = (
+        tuple(uploaded_file.file_id for uploaded_file in uploaded_user_files) if uploaded_user_files is not None else None,
+        tuple(uploaded_file.file_id for uploaded_file in uploaded_food_files) if uploaded_food_files is not None else None,
+    )
 
     if st.button("Calculate"):
+        result_views = st.session_state["result_views"] = {}
+        st.session_state["result_views_source"] = view_source
         try:
             # Process user data
-            if uploaded_user_file is not None:
-                user_data = process_user_data_file(uploaded_user_file)
-                if user_data is not None:
-                    st.subheader("Results for Uploaded Users")
-                    results = []
-                    for _, row in user_data.iterrows():
-                        try:
-                            bmr = calculate_bmr(row["gender"], row["age"], row["weight"], row["height"])
-                            bmi = calculate_bmi(row["weight"], row["height"])
-                            sodium_intake = 1500 if 19 <= row["age"] <= 50 else 2300
-                            fat_intake = (0.30 * bmr) / 9
-                            protein_min = row["weight"] * 0.8
-                            protein_max = row["weight"] * 1.2
-                            remaining_energy = bmr - (fat_intake * 9) - (protein_min * 4)
-                            carb_intake = max(remaining_energy / 4, 0)
-                            sugar_intake = suggest_daily_sugar()
-                            results.append({
-                                "Name": row["name"],
-                                "Gender": row["gender"],
-                                "Age": row["age"],
-                                "Weight (kg)": row["weight"],
-                                "Height (cm)": row["height"],
-                                "BMR (Calories)": round(bmr, 2),
-                                "BMI": round(bmi, 2),
-                                "Sodium Intake (mg)": sodium_intake,
-                                "Fat Intake (g)": round(fat_intake, 2),
-                                "Protein Intake (g)": f"{round(protein_min, 2)} - {round(protein_max, 2)}",
-                                "Carbohydrate Intake (g)": round(carb_intake, 2),
-                                "Sugar Intake (g)": sugar_intake,
-                            })
-                        except Exception as e:
-                            st.error(f"Error processing user: {e}")
-                    results_df = pd.DataFrame(results)
-                    st.dataframe(results_df)
-                    csv = results_df.to_csv(index=False)
-                    st.download_button(
-                        label="Download Results as CSV",
-                        data=csv,
-                        file_name="user_results.csv",
-                        mime="text/csv",
-                    )
+            if uploaded_user_files is not None:
+                parsed_users = cached_parse(parse_cache, uploaded_user_files, parse_user, intake_engine.PARSER_VERSION)
+                if parsed_users is not None:
+                    user_data, user_rejections = parsed_users
+                    # The tables get their own titles in paged_table below
+                    show_csv_report(user_data)
+                    show_compact_report("user data", user_data)
+                    if len(user_rejections):
+                        st.error(f"User data: {rejection_summary(user_rejections)}")
+                        result_views["Rejected User Rows"] = ResultView(user_rejections, "reason")
+                    with perf_probe.stage("intake targets"):
+                        targets = target_cache.targets_frame(user_data)
+                        results_df = format_intake_results(user_data, targets)
+                    invalid_mask = ~targets["valid"]
+                    if invalid_mask.any():
+                        skipped = ", ".join(user_data.loc[invalid_mask, "name"].astype(str).head(10))
+                        st.error(f"Error processing {invalid_mask.sum()} user(s) with invalid gender or height: {skipped}")
+                    # Keep every valid user's targets for the food percentages below
+                    user_names = user_data.loc[targets["valid"], "name"].to_numpy()
+                    user_targets = target_matrix(targets[targets["valid"]])
+                    with perf_probe.stage("results summary"):
+                        result_views["Results Table"] = ResultView(results_df, "Name")
+                        result_views["Results Table"].summary()
+                    # Export to a temporary file; the download reads it only when clicked
+                    # A failed export is reported on its own and leaves the results below intact
+                    compression = None if export_compression == "none" else export_compression
+                    try:
+                        with perf_probe.stage("results export"):
+                            export_path = export_results(results_df, export_format, compression)
+                    except Exception as e:
+                        st.error(f"Error exporting results: {e}")
+                        export_path = None
+                    # The last run's export is replaced (or dropped when this export failed)
+                    previous_export = st.session_state.get("results_export_path")
+                    if previous_export and os.path.exists(previous_export):
+                        os.remove(previous_export)
+                    st.session_state["results_export_path"] = export_path
+                    if export_path is not None:
+                        st.download_button(
+                            label=f"Download Results as {export_format.upper()}",
+                            data=partial(read_export, export_path),
+                            file_name=export_file_name("user_results", export_format, compression),
+                            mime=export_mime(export_format, compression),
+                            on_click="ignore",
+                        )
                 else:
                     st.error("Failed to process the uploaded user data file.")
             elif name and gender and age is not None and weight is not None and height is not None:
-                bmr = calculate_bmr(gender, age, weight, height)
-                bmi = calculate_bmi(weight, height)
-                sodium_intake = 1500 if 19 <= age <= 50 else 2300
-                fat_intake = (0.30 * bmr) / 9
-                protein_min = weight * 0.8
-                protein_max = weight * 1.2
-                remaining_energy = bmr - (fat_intake * 9) - (protein_min * 4)
-                carb_intake = max(remaining_energy / 4, 0)
-                sugar_intake = suggest_daily_sugar()
+                profile, problems = validate_manual_input(name, gender, age, weight, height)
+                if problems:
+                    st.error(f"Please check your input: {'; '.join(problems)}")
+                    return
+                profile_targets = target_cache.get(gender, age, weight, height)
+                bmr = profile_targets["bmr"]
+                bmi = profile_targets["bmi"]
+                sodium_intake = profile_targets["sodium_intake"]
+                fat_intake = profile_targets["fat_intake"]
+                protein_min = profile_targets["protein_min"]
+                protein_max = profile_targets["protein_max"]
+                carb_intake = profile_targets["carb_intake"]
+                sugar_intake = profile_targets["sugar_intake"]
                 st.subheader(f"{name}'s Results")
                 st.write(f"**BMR (Calories):** {bmr:.2f}")
                 st.write(f"**BMI:** {bmi:.2f}")
@@ -167,27 +357,36 @@ def main():
                 weight = weight if weight else None
                 height = height if height else None
             # Process food content data
-            if uploaded_food_file is not None:
-                if not (name and gender and age is not None and weight is not None and height is not None) and uploaded_user_file is None:
+            if uploaded_food_files is not None:
+                if not (name and gender and age is not None and weight is not None and height is not None) and uploaded_user_files is None:
                     st.error("Please provide user data (manual input or CSV) before uploading food content data.")
                     return
-                if 'bmr' not in locals() or 'carb_intake' not in locals() or 'fat_intake' not in locals() or 'protein_min' not in locals():
+                if 'user_targets' not in locals() and ('bmr' not in locals() or 'carb_intake' not in locals() or 'fat_intake' not in locals() or 'protein_min' not in locals()):
                     st.error("Please provide user data (manual input or CSV) before uploading food content data.")
                     return
-                food_data = process_food_file(uploaded_food_file)
-                if food_data is not None:
-                    st.subheader("Food Content Data")
-                    st.dataframe(food_data)
+                parsed_food = cached_parse(parse_cache, uploaded_food_files, parse_food, food_parser.PARSER_VERSION)
+                if parsed_food is not None:
+                    food_data, food_rejections = parsed_food
+                    show_csv_report(food_data)
+                    show_compact_report("food data", food_data)
+                    if len(food_rejections):
+                        st.error(f"Food data: {rejection_summary(food_rejections)}")
+                        result_views["Rejected Food Rows"] = ResultView(food_rejections, "reason")
+                    with perf_probe.stage("food summary"):
+                        result_views["Food Content Table"] = ResultView(food_data, "content" if "content" in food_data.columns else None)
+                        result_views["Food Content Table"].summary()
 
-                    # Calculate totals
-                    total_sodium = food_data["sodium"].sum()
-                    total_calories = food_data["calories"].sum()
-                    total_carbohydrates = food_data["carbohydrates"].sum()
-                    total_fat = food_data["fat"].sum()
-                    total_protein = food_data["protein"].sum()
-                    total_sugar = food_data["sugar"].sum()
+                    # Calculate totals, at 2 decimals like the results (compact float32 sums carry noise past that)
+                    with perf_probe.stage("food totals"):
+                        total_sodium = round(float(food_data["sodium"].sum()), 2)
+                        total_calories = round(float(food_data["calories"].sum()), 2)
+                        total_carbohydrates = round(float(food_data["carbohydrates"].sum()), 2)
+                        total_fat = round(float(food_data["fat"].sum()), 2)
+                        total_protein = round(float(food_data["protein"].sum()), 2)
+                        total_sugar = round(float(food_data["sugar"].sum()), 2)
 
                     # Display totals
+                    st.subheader("Food Content Data")
                     st.write(f"**Total Sodium (mg):** {total_sodium}")
                     st.write(f"**Total Calories (kcal):** {total_calories}")
                     st.write(f"**Total Carbohydrates (g):** {total_carbohydrates}")
@@ -195,22 +394,84 @@ def main():
                     st.write(f"**Total Protein (g):** {total_protein}")
                     st.write(f"**Total Sugar (g):** {total_sugar}")
 
-                    # Calculate percentages
-                    percentages = {
-                        "Sodium": calculate_percentage(total_sodium, sodium_intake) if sodium_intake > 0 else 0,
-                        "Calories": calculate_percentage(total_calories, bmr) if bmr > 0 else 0,
-                        "Carbohydrates": calculate_percentage(total_carbohydrates, carb_intake) if carb_intake > 0 else 0,
-                        "Fat": calculate_percentage(total_fat, fat_intake) if fat_intake > 0 else 0,
-                        "Protein": calculate_percentage(total_protein, protein_min) if protein_min > 0 else 0,
-                        "Sugar": calculate_percentage(total_sugar, sugar_intake) if sugar_intake > 0 else 0,
-                    }
-
-                    # Display food percentages
-                    st.subheader("Food Percentages")
-                    for nutrient, percentage in percentages.items():
-                        st.write(f"**{nutrient}:** {percentage:.2f}%" if percentage is not None else f"**{nutrient}:** N/A")
+                    # Uploaded users: percentages for every user against this food file
+                    if 'user_targets' in locals():
+                        with perf_probe.stage("food percentages"):
+                            tensor = percentage_tensor(user_targets, meal_totals([food_data]))
+                        user_percentages = pd.DataFrame(tensor[:, 0, :], columns=NUTRIENTS)
+                        user_percentages.insert(0, "Name", user_names)
+                        result_views["Food Percentages per User"] = ResultView(user_percentages.round(2), "Name")
+                        if plan_portions:
+                            with perf_probe.stage("meal plans"):
+                                meal_plans = plan_meals(user_data, plan_food_subset(food_data, plan_foods), targets=targets)
+                            result_views["Meal Plan per User"] = ResultView(meal_plans, "Name")
+                    else:
+                        # Calculate percentages
+                        percentages = {
+                            "Sodium": calculate_percentage(total_sodium, sodium_intake) if sodium_intake > 0 else 0,
+                            "Calories": calculate_percentage(total_calories, bmr) if bmr > 0 else 0,
+                            "Carbohydrates": calculate_percentage(total_carbohydrates, carb_intake) if carb_intake > 0 else 0,
+                            "Fat": calculate_percentage(total_fat, fat_intake) if fat_intake > 0 else 0,
+                            "Protein": calculate_percentage(total_protein, protein_min) if protein_min > 0 else 0,
+                            "Sugar": calculate_percentage(total_sugar, sugar_intake) if sugar_intake > 0 else 0,
+                        }
+
+                        # Display food percentages
+                        st.subheader("Food Percentages")
+                        for nutrient, percentage in percentages.items():
+                            st.write(f"**{nutrient}:** {percentage:.2f}%" if percentage is not None else f"**{nutrient}:** N/A")
+
+                        # Portions of each food that best meet this person's targets
+                        if plan_portions:
+                            meal_plan = plan_meals(
+                                profile, plan_food_subset(food_data, plan_foods), targets=pd.DataFrame([{**profile_targets, "valid": True}])
+                            )
+                            st.subheader("Suggested Portions")
+                            st.dataframe(meal_plan.drop(columns=["Name"]).T.rename(columns={0: "Value"}))
+
         except Exception as e:
             st.error(f"An error occurred: {e}")
             # Removed unnecessary else block causing a compile error
+
+    # Paged result tables from the last calculation with the current uploads
+    if st.session_state.get("result_views_source") == view_source:
+        for title, view in st.session_state.get("result_views", {}).items():
+            with perf_probe.stage(f"{title.lower()} page"):
+                paged_table(title, view, "result_view_" + title.lower().replace(" ", "_"))
+
+    # Meal builder against the manual input's targets (totals only for CSV users)
+    if uploaded_food_files is not None:
+        meal_targets = None
+        if input_method == "Manual Input" and gender:
+            # The name isn't needed for the targets
+            _, problems = validate_manual_input(name or "-", gender, age, weight, height)
+            if problems:
+                st.warning(f"Enter a valid profile to see meal percentages ({'; '.join(problems)}).")
+            else:
+                meal_targets = target_cache.get(gender, age, weight, height)
+        meal_builder(uploaded_food_files, parse_cache, meal_targets, parse_food)
+
+        # Logging needs a named, valid profile to file the meal under
+        if meal_targets is not None and name and "meal" in st.session_state:
+            food_log_panel(st.session_state["meal"], {"name": name, "gender": gender, "age": age, "weight": weight, "height": height})
+
+    # Show how often uploads were served from the parse cache
+    cache_stats = parse_cache.stats()
+    st.caption(
+        f"Parse cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+        f"{cache_stats['entries']} entries, {cache_stats['bytes'] / 1024 / 1024:.1f} / "
+        f"{cache_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+    )
+    target_stats = target_cache.stats()
+    st.caption(
+        f"Target cache: {target_stats['rows']} rows served from {target_stats['misses']} computed profiles "
+        f"and {target_stats['uncached']} uncached rows, "
+        f"{target_stats['hit_rate']:.0%} profile hit rate, {target_stats['entries']} entries"
+    )
+
+    # Per-stage timings, only collected when INTAKE_PERF=1
+    if perf_probe.ENABLED and perf_probe.records():
+        with st.expander("Performance"):
+            st.table(pd.DataFrame(perf_probe.records()))
 if __name__ == "__main__":
     main()
\ No newline at end of file